@@ -1,28 +1,182 @@
+import asyncio
+import base64
+import hashlib
 import os
+import stat
+import tempfile
+import time
+from collections import OrderedDict
 from pathlib import Path
-from typing import List, Optional, Any, Dict
+from typing import List, Optional, Any, Dict, Tuple
 
 import uvicorn
-from fastapi import FastAPI, File, UploadFile, Form, HTTPException
-from fastapi.responses import JSONResponse, HTMLResponse, FileResponse
+from fastapi import FastAPI, File, UploadFile, Form, HTTPException, Request
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, HTMLResponse, FileResponse, ORJSONResponse
 
 from config import (
     AUDIO_SAVE_DIR,
+    BATCH_CONCURRENCY,
+    DEV_MODE,
+    MAX_REQUEST_BYTES,
+    MAX_RESUME_BYTES,
+    RESUME_CACHE_SIZE,
     RECOMMENDED_FILE,
     GOOGLE_API_KEY,
     groq_client,
     logger,
     STATIC_DIR,
+    WEB_CONCURRENCY,
 )
 from openapi_patch import custom_openapi
 from models import ScoreResponse
-from service import process_single_resume_enhanced
-from llm_utils import extract_skills_with_gemini
-from utils import append_to_recommended_file
+from service import (
+    process_single_resume_enhanced,
+    extract_resume_profile,
+    extract_resume_profile_with_jd_skills,
+    needs_feedback_report,
+)
+from feedback import generate_feedback_pdfs_batched
+from llm_utils import extract_skills_with_gemini_async
+from scoring import precompute_jd_context
+from utils import RecommendedWriter, is_recommended
+
+class SelectiveGZipMiddleware(GZipMiddleware):
+    """GZip responses except under ``excluded_prefixes`` (already-compressed media)."""
+
+    def __init__(self, app, excluded_prefixes: Tuple[str, ...] = ("/audio/",), **kwargs):
+        super().__init__(app, **kwargs)
+        self.excluded_prefixes = excluded_prefixes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"].startswith(self.excluded_prefixes):
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
 
-app = FastAPI(title="Resume Rating", version="1.0.0")
+
+app = FastAPI(title="Resume Rating", version="1.0.0", default_response_class=ORJSONResponse)
+# Batch responses (repeated keys, base64 PDFs, prose) compress several-fold
+app.add_middleware(SelectiveGZipMiddleware, minimum_size=1024, compresslevel=5)
 app.openapi = lambda: custom_openapi(app)
 
+class AudioFileResponse(FileResponse):
+    # Fewer read/send round-trips than the 64 KB default for multi-MB audio files
+    chunk_size = 1024 * 1024
+
+
+# Bounds how many resumes of a batch hit the LLM providers at the same time
+_BATCH_SEMAPHORE = asyncio.Semaphore(BATCH_CONCURRENCY)
+# Resume analysis keyed by blake2b of the uploaded bytes, plus the JD's digest for
+# profiles extracted in the same request as the JD skills (LRU order)
+_RESUME_CACHE: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+
+@app.middleware("http")
+async def reject_oversized_requests(request: Request, call_next):
+    # Refuse oversized uploads from the declared Content-Length before the multipart body is read.
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > MAX_REQUEST_BYTES:
+        return JSONResponse(
+            status_code=413,
+            content={"detail": f"Request body too large (limit {MAX_REQUEST_BYTES // (1024 * 1024)} MB)."}
+        )
+    return await call_next(request)
+
+
+async def _spool_to_tempfile(upload: UploadFile, chunk_size: int = 1 << 20) -> Tuple[Path, str]:
+    """Copy an upload to a named temp file in bounded chunks.
+
+    Returns the temp file path and a blake2b digest of the content.
+    """
+    suffix = Path(upload.filename or "").suffix.lower()
+    tmp = tempfile.NamedTemporaryFile(delete=False, suffix=suffix)
+    tmp_path = Path(tmp.name)
+    digest = hashlib.blake2b(digest_size=16)
+    written = 0
+    try:
+        while True:
+            chunk = await upload.read(chunk_size)
+            if not chunk:
+                break
+            digest.update(chunk)
+            written += len(chunk)
+            if written > MAX_RESUME_BYTES:
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"File '{upload.filename}' exceeds the {MAX_RESUME_BYTES // (1024 * 1024)} MB limit."
+                )
+            await asyncio.to_thread(tmp.write, chunk)
+        await asyncio.to_thread(tmp.close)
+    except BaseException:
+        tmp.close()
+        _unlink_quietly(tmp_path)
+        raise
+    return tmp_path, digest.hexdigest()
+
+
+def _unlink_quietly(path: Path) -> None:
+    try:
+        os.unlink(path)
+    except OSError as e:
+        logger.warning(f"Could not remove temporary upload {path}: {e}")
+
+
+def _resume_cache_key(content_hash: str, job_description: Optional[str] = None) -> str:
+    # The combined prompt that also lists the JD skills shows the JD to the model,
+    # so the resume skills it returns are only reusable for that same JD.
+    if job_description is None:
+        return content_hash
+    jd_hash = hashlib.blake2b(job_description.encode("utf-8"), digest_size=16).hexdigest()
+    return f"{content_hash}:{jd_hash}"
+
+
+def _get_cached_resume(key: str) -> Optional[Dict[str, Any]]:
+    profile = _RESUME_CACHE.get(key)
+    if profile is not None:
+        _RESUME_CACHE.move_to_end(key)
+    return profile
+
+
+def _store_cached_resume(key: str, profile: Dict[str, Any]) -> None:
+    if RESUME_CACHE_SIZE <= 0:
+        return
+    _RESUME_CACHE[key] = profile
+    _RESUME_CACHE.move_to_end(key)
+    while len(_RESUME_CACHE) > RESUME_CACHE_SIZE:
+        _RESUME_CACHE.popitem(last=False)
+
+
+async def _score_upload(job_description: str, resume_file: UploadFile,
+                        jd_skills: Optional[List[str]] = None, **kwargs) -> Dict[str, Any]:
+    """Score one upload, reusing the parsed resume when the same file was seen before."""
+    resume_path, content_hash = await _spool_to_tempfile(resume_file)
+    try:
+        jd_cache_key = _resume_cache_key(content_hash, job_description)
+        parsed_resume = _get_cached_resume(content_hash)
+        if parsed_resume is None and jd_skills is None:
+            parsed_resume = _get_cached_resume(jd_cache_key)
+        if parsed_resume is None:
+            if jd_skills is None:
+                # One LLM request covers the resume extractions and the JD skills
+                parsed_resume, jd_skills = await extract_resume_profile_with_jd_skills(
+                    resume_file, job_description, resume_path=resume_path
+                )
+                cache_key = jd_cache_key
+            else:
+                parsed_resume = await extract_resume_profile(resume_file, resume_path=resume_path)
+                cache_key = content_hash
+            # A profile built from the regex fallbacks during an LLM outage would outlive the outage
+            if parsed_resume.get("from_llm"):
+                _store_cached_resume(cache_key, parsed_resume)
+        else:
+            logger.info(f"Resume cache hit for {resume_file.filename}")
+        return await process_single_resume_enhanced(
+            job_description, resume_file, jd_skills=jd_skills, parsed_resume=parsed_resume, **kwargs
+        )
+    finally:
+        _unlink_quietly(resume_path)
+
 
 @app.post("/rate", response_model=ScoreResponse)
 async def rate_resume_enhanced(
@@ -30,103 +184,128 @@ async def rate_resume_enhanced(
     resume: UploadFile = File(...),
     include_audio: Optional[bool] = Form(False)
 ):
-    result = await process_single_resume_enhanced(
+    result = await _score_upload(
         job_description, resume, jd_skills=None, include_audio=bool(include_audio)
     )
-    return JSONResponse(content=result)
+    return ORJSONResponse(content=result)
+
+
+def _error_result(filename: str, jd_skills: List[str], error: BaseException) -> Dict[str, Any]:
+    return {
+        "candidate_name": "Processing Failed",
+        "filename": filename,
+        "final_score_0_10": 0.0,
+        "final_score_0_100": 0.0,
+        "component_scores": {},
+        "per_component_0_10": {},
+        "matched_skills": [],
+        "jd_skills": jd_skills,
+        "resume_skills": [],
+        "years_experience_estimate": 0.0,
+        "technical_years_estimate": 0.0,
+        "skill_evidence": {},
+        "confidence_scores": {},
+        "match_statistics": {},
+        "missing_requirements": ["processing_error"],
+        "llm_justification": {
+            "overall_assessment": {
+                "summary": f"Processing failed: {str(error)}",
+                "key_strengths": [],
+                "areas_for_improvement": ["File processing error"]
+            },
+            "recommendation": {
+                "decision": "Not Recommended",
+                "reasoning": "Technical processing error"
+            }
+        },
+        "tts_audio_base64": None,
+        "tts_saved_filename": None,
+        "experience_data": {},
+        "feedback_report_base64": None
+    }
 
 
 @app.post("/batch-rate", response_model=List[ScoreResponse])
 async def batch_rate_enhanced(
     job_description: str = Form(...),
     resumes: List[UploadFile] = File(...),
-    include_audio: Optional[bool] = Form(False)
+    include_audio: Optional[bool] = Form(False),
+    include_feedback: Optional[bool] = Form(True)
 ):
     # Clear old recommendations file
     try:
-        if os.path.exists(RECOMMENDED_FILE):
-            os.remove(RECOMMENDED_FILE)
-            logger.info(f"Cleared old recommendations file: {RECOMMENDED_FILE}")
+        await asyncio.to_thread(os.remove, RECOMMENDED_FILE)
+        logger.info(f"Cleared old recommendations file: {RECOMMENDED_FILE}")
+    except FileNotFoundError:
+        pass
     except Exception as e:
         logger.warning(f"Could not remove old recommendations file: {e}")
 
-    jd_skills = extract_skills_with_gemini(job_description, role="job_description", max_skills=50)
+    jd_skills = await extract_skills_with_gemini_async(job_description, role="job_description", max_skills=50)
     if not jd_skills:
         logger.warning("No JD skills extracted, using fallback parsing")
         jd_skills = []
+    # Variant index and JD keyword counts are shared by every resume in the batch
+    jd_context = await asyncio.to_thread(precompute_jd_context, job_description, jd_skills)
 
-    results = []
-    recommended_count = 0
-
-    for resume_file in resumes:
-        try:
-            result = await process_single_resume_enhanced(
-                job_description, resume_file, jd_skills=jd_skills, include_audio=bool(include_audio)
+    async def _process_one(resume_file: UploadFile, writer: RecommendedWriter) -> Tuple[Dict[str, Any], bool]:
+        async with _BATCH_SEMAPHORE:
+            result = await _score_upload(
+                job_description, resume_file, jd_skills=jd_skills, include_audio=bool(include_audio),
+                generate_feedback=False, jd_context=jd_context
             )
 
-            justification = result.get("llm_justification", {})
-            recommendation = justification.get("recommendation", {})
-            decision = recommendation.get("decision", "").lower()
-            score = result.get("final_score_0_10", 0)
+        justification = result.get("llm_justification", {})
+        recommendation = justification.get("recommendation", {})
+        decision = recommendation.get("decision", "").lower()
+        score = result.get("final_score_0_10", 0)
 
-            should_recommend = (
-                score >= 6.5 and any(keyword in decision for keyword in ["strong recommend", "recommend"]) or
-                score >= 7.5
-            )
+        should_recommend = is_recommended(score, decision)
 
-            if should_recommend:
-                try:
-                    next_steps = justification.get("next_steps", [])
-                    append_to_recommended_file(
-                        result.get("candidate_name", "Unknown"),
-                        next_steps,
-                        result.get("final_score_0_10", 0.0),
-                        justification
-                    )
-                    recommended_count += 1
-                except Exception as e:
-                    logger.warning(f"Failed to add {resume_file.filename} to recommended list: {e}")
-
-            results.append(result)
-
-        except Exception as e:
-            logger.exception("Error processing resume %s: %s", getattr(resume_file, "filename", "<unknown>"), e)
-            error_result = {
-                "candidate_name": "Processing Failed",
-                "filename": getattr(resume_file, "filename", "unknown"),
-                "final_score_0_10": 0.0,
-                "final_score_0_100": 0.0,
-                "component_scores": {},
-                "per_component_0_10": {},
-                "matched_skills": [],
-                "jd_skills": jd_skills,
-                "resume_skills": [],
-                "years_experience_estimate": 0.0,
-                "technical_years_estimate": 0.0,
-                "skill_evidence": {},
-                "confidence_scores": {},
-                "match_statistics": {},
-                "missing_requirements": ["processing_error"],
-                "llm_justification": {
-                    "overall_assessment": {
-                        "summary": f"Processing failed: {str(e)}",
-                        "key_strengths": [],
-                        "areas_for_improvement": ["File processing error"]
-                    },
-                    "recommendation": {
-                        "decision": "Not Recommended",
-                        "reasoning": "Technical processing error"
-                    }
-                },
-                "tts_audio_base64": None,
-                "tts_saved_filename": None,
-                "experience_data": {},
-                "feedback_report_base64": None
-            }
-            results.append(error_result)
+        recommended = False
+        if should_recommend:
+            try:
+                next_steps = justification.get("next_steps", [])
+                await writer.write(
+                    result.get("candidate_name", "Unknown"),
+                    next_steps,
+                    result.get("final_score_0_10", 0.0),
+                    justification
+                )
+                recommended = True
+            except Exception as e:
+                logger.warning(f"Failed to add {resume_file.filename} to recommended list: {e}")
+
+        return result, recommended
+
+    async with RecommendedWriter(RECOMMENDED_FILE) as writer:
+        outcomes = await asyncio.gather(*[_process_one(rf, writer) for rf in resumes], return_exceptions=True)
 
+    results = []
+    processed = []
+    recommended_flags = []
+    for resume_file, outcome in zip(resumes, outcomes):
+        if isinstance(outcome, BaseException):
+            logger.error("Error processing resume %s: %s", getattr(resume_file, "filename", "<unknown>"), outcome,
+                         exc_info=outcome)
+            results.append(_error_result(getattr(resume_file, "filename", "unknown"), jd_skills, outcome))
+            continue
+        result, recommended = outcome
+        results.append(result)
+        processed.append(result)
+        recommended_flags.append(recommended)
+
+    # Feedback letters are generated after scoring so they can share combined LLM requests.
+    needs_feedback = [r for r in processed if needs_feedback_report(r)] if include_feedback else []
+    if needs_feedback:
+        pdfs = await generate_feedback_pdfs_batched(needs_feedback)
+        for result, pdf_bytes in zip(needs_feedback, pdfs):
+            if pdf_bytes:
+                result["feedback_report_base64"] = base64.b64encode(pdf_bytes).decode('utf-8')
+
+    recommended_count = sum(recommended_flags)
     logger.info(f"Batch processing complete: {len(results)} resumes processed, {recommended_count} candidates recommended")
-    return JSONResponse(content=results)
+    return ORJSONResponse(content=results)
 
 
 @app.get("/", response_class=HTMLResponse)
@@ -143,7 +322,11 @@ async def serve_audio(filename: str):
         raise HTTPException(status_code=400, detail="Invalid filename")
 
     path = Path(AUDIO_SAVE_DIR) / filename
-    if not path.exists():
+    try:
+        stat_result = await asyncio.to_thread(os.stat, path)
+    except OSError:
+        stat_result = None
+    if stat_result is None or not stat.S_ISREG(stat_result.st_mode):
         raise HTTPException(status_code=404, detail="Audio file not found")
 
     ext = path.suffix.lower()
@@ -153,7 +336,19 @@ async def serve_audio(filename: str):
         ".wav": "audio/wav"
     }.get(ext, "audio/wav")
 
-    return FileResponse(path, media_type=media_type, filename=filename)
+    # Reuse the stat above; Starlette derives Content-Length, ETag and Range handling from it.
+    return AudioFileResponse(path, media_type=media_type, filename=filename, stat_result=stat_result)
+
+
+def _file_has_content(path: str, chunk_size: int = 4096) -> bool:
+    # Only read until the first non-whitespace character instead of the whole file.
+    with open(path, 'r', encoding='utf-8') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                return False
+            if chunk.strip():
+                return True
 
 
 @app.get("/download-recommended")
@@ -165,13 +360,12 @@ async def download_recommended():
         )
 
     try:
-        with open(RECOMMENDED_FILE, 'r', encoding='utf-8') as f:
-            content = f.read().strip()
-            if not content:
-                return JSONResponse(
-                    status_code=404,
-                    content={"detail": "No candidates have been recommended yet. The recommendations file is empty."}
-                )
+        has_content = await asyncio.to_thread(_file_has_content, RECOMMENDED_FILE)
+        if not has_content:
+            return JSONResponse(
+                status_code=404,
+                content={"detail": "No candidates have been recommended yet. The recommendations file is empty."}
+            )
     except Exception as e:
         return JSONResponse(
             status_code=500,
@@ -185,6 +379,29 @@ async def download_recommended():
     )
 
 
+_AUDIO_COUNT_TTL_SECONDS = 5.0
+_audio_count_cache: Tuple[float, int] = (float("-inf"), 0)
+
+
+def _count_audio_files() -> int:
+    try:
+        with os.scandir(AUDIO_SAVE_DIR) as it:
+            return sum(1 for entry in it if entry.is_file(follow_symlinks=False))
+    except FileNotFoundError:
+        return 0
+
+
+async def _cached_audio_file_count() -> int:
+    # Health probes arrive in bursts; share one directory scan per TTL window.
+    global _audio_count_cache
+    stamp, count = _audio_count_cache
+    now = time.monotonic()
+    if now - stamp > _AUDIO_COUNT_TTL_SECONDS:
+        count = await asyncio.to_thread(_count_audio_files)
+        _audio_count_cache = (now, count)
+    return count
+
+
 @app.get("/health")
 async def health():
     return {
@@ -200,14 +417,18 @@ async def health():
         },
         "audio_dir": str(Path(AUDIO_SAVE_DIR).resolve()),
         "recommended_file": str(Path(RECOMMENDED_FILE).resolve()),
-        "total_audio_files": len(list(Path(AUDIO_SAVE_DIR).glob("*"))),
+        "total_audio_files": await _cached_audio_file_count(),
     }
 
 
 if __name__ == "__main__":
+    # uvicorn refuses multiple workers together with reload, so DEV=1 keeps a single reloading process.
     uvicorn.run(
         "app:app",
         host="127.0.0.1",
         port=int(os.getenv("PORT", 8000)),
-        reload=True
+        reload=DEV_MODE,
+        workers=None if DEV_MODE else WEB_CONCURRENCY,
+        loop="auto",
+        http="httptools",
     )
\ No newline at end of file
@@ -1,13 +1,19 @@
 import os
+import importlib
 import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 from dotenv import load_dotenv
 
+from rate_limiter import AsyncTokenBucket
+
 # Optional imports kept to preserve logic
 try:
-    from groq import Groq
+    from groq import AsyncGroq, Groq
 except ImportError:
+    AsyncGroq = None
     Groq = None
 
 try:
@@ -29,6 +35,44 @@ RECOMMENDED_FILE = os.getenv("RECOMMENDED_FILE", "./recommended.txt")
 STATIC_DIR = os.getenv("STATIC_DIR", "./static")
 Path(STATIC_DIR).mkdir(parents=True, exist_ok=True)
 
+# Upper bound on resumes processed concurrently inside a single /batch-rate call
+BATCH_CONCURRENCY = max(1, int(os.getenv("BATCH_CONCURRENCY", "8")))
+
+# Parsed resumes (text, skills, experience) kept in memory, keyed by file content hash
+RESUME_CACHE_SIZE = max(0, int(os.getenv("RESUME_CACHE_SIZE", "512")))
+
+# uvicorn worker processes started by `python app.py`; DEV=1 runs a single reloading process
+DEV_MODE = os.getenv("DEV") == "1"
+WEB_CONCURRENCY = 1 if DEV_MODE else max(1, int(os.getenv("WEB_CONCURRENCY", str(os.cpu_count() or 1))))
+
+# CPU-bound work (resume parsing, feedback PDF layout) runs in a process pool.
+# Files smaller than PROCESS_POOL_MIN_BYTES are parsed in a thread instead, where
+# the IPC overhead would outweigh the parallelism. Every web worker gets its own
+# pool, so by default the cores are split between them.
+CPU_POOL_WORKERS = max(1, int(os.getenv("CPU_POOL_WORKERS", str((os.cpu_count() or 1) // WEB_CONCURRENCY))))
+PROCESS_POOL_MIN_BYTES = int(os.getenv("PROCESS_POOL_MIN_KB", "256")) * 1024
+
+
+def _init_worker():
+    # Pay the heavy imports once per worker process rather than on the first task.
+    for module in ("fitz", "docx", "fpdf"):
+        try:
+            importlib.import_module(module)
+        except ImportError:
+            pass
+
+
+# Worker processes are only started on first submit, by which time this process runs
+# threads (uvicorn, to_thread workers, LLM call pools); forking it then could copy
+# locks held by those threads, so workers come from a forkserver (spawn on Windows).
+_CPU_POOL_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+CPU_POOL = ProcessPoolExecutor(max_workers=CPU_POOL_WORKERS, initializer=_init_worker,
+                               mp_context=multiprocessing.get_context(_CPU_POOL_START_METHOD))
+
+# Upload limits: a single resume, and a whole multipart request (checked via Content-Length)
+MAX_RESUME_BYTES = int(float(os.getenv("MAX_RESUME_MB", "20")) * 1024 * 1024)
+MAX_REQUEST_BYTES = int(float(os.getenv("MAX_REQUEST_MB", "200")) * 1024 * 1024)
+
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 
@@ -37,13 +81,29 @@ if not GOOGLE_API_KEY:
 if not GROQ_API_KEY:
     logger.info("GROQ_API_KEY not set — Groq fallback will be unavailable.")
 
+# Shared request pacing for the LLM providers (per process)
+GEMINI_LIMITER = AsyncTokenBucket(rpm=int(os.getenv("GEMINI_RPM", "60")), tpm=int(os.getenv("GEMINI_TPM", "100000")))
+GROQ_LIMITER = AsyncTokenBucket(rpm=int(os.getenv("GROQ_RPM", "30")), tpm=int(os.getenv("GROQ_TPM", "14400")))
+
+# Upper bound on LLM requests in flight at once from this process (async path)
+LLM_CONCURRENCY = max(1, int(os.getenv("LLM_CONCURRENCY", "8")))
+# Seconds to wait for a Gemini response before retrying once, then falling back to Groq
+LLM_REQUEST_TIMEOUT = float(os.getenv("LLM_REQUEST_TIMEOUT", "15"))
+
+# Raw LLM responses cached by prompt hash (LLM_CACHE_SIZE=0 disables)
+LLM_CACHE_SIZE = max(0, int(os.getenv("LLM_CACHE_SIZE", "10000")))
+LLM_CACHE_TTL_SECONDS = float(os.getenv("LLM_CACHE_TTL_SECONDS", "3600"))
+
 # Initialize Groq client if key provided
 groq_client = None
+groq_async_client = None
 if GROQ_API_KEY and Groq is not None:
     try:
         groq_client = Groq(api_key=GROQ_API_KEY)
+        groq_async_client = AsyncGroq(api_key=GROQ_API_KEY)
         logger.info("Groq client initialized for fallback.")
     except Exception as e:
         logger.warning("Failed to initialize Groq client: %s", e)
         groq_client = None
+        groq_async_client = None
         
\ No newline at end of file
@@ -1,74 +1,206 @@
+import asyncio
 import base64
+import re
 from datetime import datetime
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
-from config import logger
+from config import CPU_POOL, logger
 from llm_utils import call_llm_with_fallback
+from rate_limiter import estimate_tokens
 
+try:
+    from fpdf import FPDF
+except ImportError:
+    FPDF = None
 
-def generate_candidate_feedback_pdf(result: Dict[str, Any]) -> Optional[bytes]:
-    candidate_name = result.get("candidate_name", "Candidate")
+FEEDBACK_SEPARATOR = "<<<SEP>>>"
+# Letters per combined LLM request; keeps the prompt and response within per-request token caps
+FEEDBACK_BATCH_SIZE = 10
+# Above this many prompt tokens the candidate details are sent in compact form
+FEEDBACK_PROMPT_SOFT_LIMIT = 1800
+FEEDBACK_COMPACT_MAX_SKILLS = 20
+
+FEEDBACK_LETTER_GUIDELINES = """Write a professional, encouraging 3-4 paragraph letter that:
+1. Thanks them for their application and acknowledges their efforts
+2. Highlights their strengths and potential
+3. Provides specific, actionable advice for skill development
+4. Ends with encouragement about their career journey
+
+Tone: Professional, supportive, constructive (not harsh or discouraging)"""
 
+FEEDBACK_PDF_TITLE = "Career Development Feedback - "
+FEEDBACK_PDF_CLOSING = "Best wishes for your continued professional development!"
+
+# fpdf2 core fonts are latin-1 only; anything outside it becomes "?" in one pass
+_NON_LATIN1_RE = re.compile(r"[^\x00-\xff]")
+
+
+def _candidate_feedback_details(result: Dict[str, Any], compact: bool = False) -> str:
     overall_assessment = result.get("llm_justification", {}).get("overall_assessment", {})
-    skills_eval = result.get("llm_justification", {}).get("skills_evaluation", {})
-    recommendation = result.get("llm_justification", {}).get("recommendation", {})
+    matched_skills = result.get('matched_skills', [])
+    key_strengths = overall_assessment.get('key_strengths', [])
+    areas_for_improvement = overall_assessment.get('areas_for_improvement', [])
+
+    if compact:
+        # Strongest matches first, then flat "; "-joined lists instead of Python reprs
+        confidence = result.get('confidence_scores', {})
+        matched_skills = sorted(matched_skills, key=lambda s: confidence.get(s, 0), reverse=True)
+        matched_skills = "; ".join(matched_skills[:FEEDBACK_COMPACT_MAX_SKILLS])
+        key_strengths = "; ".join(map(str, key_strengths))
+        areas_for_improvement = "; ".join(map(str, areas_for_improvement))
+
+    return f"""- Overall score: {result.get('final_score_0_10', 0)}/10
+- Matched skills: {matched_skills}
+- Experience level: {result.get('years_experience_estimate', 0)} years
+- Key strengths: {key_strengths}
+- Areas for improvement: {areas_for_improvement}"""
+
 
-    feedback_prompt = f"""
+def _build_feedback_prompt(result: Dict[str, Any], compact: bool = False) -> str:
+    candidate_name = result.get("candidate_name", "Candidate")
+    prompt = f"""
 Write a constructive, encouraging feedback letter for {candidate_name} who applied for a technical position.
 
 Key information:
-- Overall score: {result.get('final_score_0_10', 0)}/10
-- Matched skills: {result.get('matched_skills', [])}
-- Experience level: {result.get('years_experience_estimate', 0)} years
-- Key strengths: {overall_assessment.get('key_strengths', [])}
-- Areas for improvement: {overall_assessment.get('areas_for_improvement', [])}
+{_candidate_feedback_details(result, compact)}
 
-Write a professional, encouraging 3-4 paragraph letter that:
-1. Thanks them for their application and acknowledges their efforts
-2. Highlights their strengths and potential 
-3. Provides specific, actionable advice for skill development
-4. Ends with encouragement about their career journey
-
-Tone: Professional, supportive, constructive (not harsh or discouraging)
+{FEEDBACK_LETTER_GUIDELINES}
+"""
+    if not compact and estimate_tokens(prompt) > FEEDBACK_PROMPT_SOFT_LIMIT:
+        return _build_feedback_prompt(result, compact=True)
+    return prompt
+
+
+def _build_feedback_batch_prompt(results: List[Dict[str, Any]]) -> str:
+    # Compact any candidate whose details alone would take most of a single-letter budget
+    details = []
+    for result in results:
+        detail = _candidate_feedback_details(result)
+        if estimate_tokens(detail) > FEEDBACK_PROMPT_SOFT_LIMIT // 2:
+            detail = _candidate_feedback_details(result, compact=True)
+        details.append(detail)
+    candidates = "\n\n".join(
+        f"Candidate {i} ({result.get('candidate_name', 'Candidate')}):\n{detail}"
+        for i, (result, detail) in enumerate(zip(results, details), start=1)
+    )
+    return f"""
+Write {len(results)} separate constructive, encouraging feedback letters, one for each candidate below.
+Each candidate applied for a technical position.
+
+{FEEDBACK_LETTER_GUIDELINES}
+
+Return the letters in the same order as the candidates. Separate consecutive letters with a line
+containing only {FEEDBACK_SEPARATOR}. Do not add any other headings, numbering or commentary.
+
+{candidates}
 """
+
+
+def generate_feedback_text(result: Dict[str, Any]) -> Optional[str]:
     try:
-        feedback_text = call_llm_with_fallback(feedback_prompt, json_expected=False)
-        if not feedback_text:
-            return None
+        feedback_text = call_llm_with_fallback(_build_feedback_prompt(result), json_expected=False)
+        return feedback_text or None
     except Exception as e:
         logger.error(f"Error generating feedback text: {e}")
         return None
 
+
+def generate_feedback_batch(results: List[Dict[str, Any]]) -> List[Optional[str]]:
+    """Generate feedback letters for several candidates with a single LLM request.
+
+    Falls back to one request per candidate when the combined response does not
+    split into exactly one letter per candidate.
+    """
+    if not results:
+        return []
+    if len(results) == 1:
+        return [generate_feedback_text(results[0])]
+
     try:
-        from fpdf import FPDF
+        raw = call_llm_with_fallback(_build_feedback_batch_prompt(results), json_expected=False)
+        letters = [letter.strip() for letter in raw.split(FEEDBACK_SEPARATOR)] if raw else []
+        letters = [letter for letter in letters if letter]
+        if len(letters) == len(results):
+            return letters
+        logger.warning(f"Batched feedback returned {len(letters)} letters for {len(results)} candidates; "
+                       f"falling back to per-candidate requests.")
+    except Exception as e:
+        logger.warning(f"Batched feedback generation failed: {e}; falling back to per-candidate requests.")
 
-        sanitized_name = candidate_name.encode('latin-1', 'replace').decode('latin-1')
-        sanitized_feedback = feedback_text.encode('latin-1', 'replace').decode('latin-1')
+    return [generate_feedback_text(result) for result in results]
 
-        pdf = FPDF()
-        pdf.add_page()
 
-        pdf.set_font("Helvetica", "B", 16)
-        pdf.cell(0, 10, f"Career Development Feedback - {sanitized_name}", 0, 1, "C")
-        pdf.ln(5)
+def _new_pdf(candidate_name: str):
+    """Start a feedback document with the fixed header and date line already laid out."""
+    pdf = FPDF()
+    pdf.add_page()
 
-        pdf.set_font("Helvetica", "", 10)
-        pdf.cell(0, 10, f"Date: {datetime.now().strftime('%B %d, %Y')}", 0, 1, "R")
-        pdf.ln(5)
+    pdf.set_font("Helvetica", "B", 16)
+    pdf.cell(0, 10, f"{FEEDBACK_PDF_TITLE}{candidate_name}", 0, 1, "C")
+    pdf.ln(5)
+
+    pdf.set_font("Helvetica", "", 10)
+    pdf.cell(0, 10, f"Date: {datetime.now().strftime('%B %d, %Y')}", 0, 1, "R")
+    pdf.ln(5)
+    return pdf
+
+
+def render_feedback_pdf(candidate_name: str, feedback_text: str) -> Optional[bytes]:
+    if FPDF is None:
+        logger.error("fpdf2 is not installed. Please run 'pip install fpdf2' to enable PDF generation.")
+        return None
+
+    try:
+        sanitized_name = _NON_LATIN1_RE.sub("?", candidate_name)
+        sanitized_feedback = _NON_LATIN1_RE.sub("?", feedback_text)
+
+        pdf = _new_pdf(sanitized_name)
 
         pdf.set_font("Helvetica", "", 12)
         pdf.multi_cell(0, 6, sanitized_feedback)
         pdf.ln(5)
 
         pdf.set_font("Helvetica", "I", 10)
-        pdf.multi_cell(0, 5, "Best wishes for your continued professional development!")
+        pdf.multi_cell(0, 5, FEEDBACK_PDF_CLOSING)
 
         return pdf.output()
 
-    except ImportError:
-        logger.error("fpdf2 is not installed. Please run 'pip install fpdf2' to enable PDF generation.")
-        return None
     except Exception as e:
         logger.error(f"Failed to create PDF report: {e}")
         return None
-    
\ No newline at end of file
+
+
+def generate_candidate_feedback_pdf(result: Dict[str, Any]) -> Optional[bytes]:
+    feedback_text = generate_feedback_text(result)
+    if not feedback_text:
+        return None
+    return render_feedback_pdf(result.get("candidate_name", "Candidate"), feedback_text)
+
+
+async def render_feedback_pdf_async(candidate_name: str, feedback_text: str) -> Optional[bytes]:
+    # fpdf2 layout is pure-Python CPU work; run it in the process pool for real parallelism.
+    return await asyncio.get_running_loop().run_in_executor(CPU_POOL, render_feedback_pdf,
+                                                            candidate_name, feedback_text)
+
+
+async def generate_candidate_feedback_pdf_async(result: Dict[str, Any]) -> Optional[bytes]:
+    # The LLM call blocks on network I/O (thread); the layout is CPU-bound (process pool).
+    feedback_text = await asyncio.to_thread(generate_feedback_text, result)
+    if not feedback_text:
+        return None
+    return await render_feedback_pdf_async(result.get("candidate_name", "Candidate"), feedback_text)
+
+
+async def generate_feedback_pdfs_batched(results: List[Dict[str, Any]],
+                                         batch_size: int = FEEDBACK_BATCH_SIZE) -> List[Optional[bytes]]:
+    """Feedback PDFs for many candidates, packing up to ``batch_size`` letters per LLM request."""
+    batches = [results[i:i + batch_size] for i in range(0, len(results), batch_size)]
+    letter_batches = await asyncio.gather(*[asyncio.to_thread(generate_feedback_batch, b) for b in batches])
+
+    async def _render(result: Dict[str, Any], letter: Optional[str]) -> Optional[bytes]:
+        if not letter:
+            return None
+        return await render_feedback_pdf_async(result.get("candidate_name", "Candidate"), letter)
+
+    letters = [letter for batch in letter_batches for letter in batch]
+    return list(await asyncio.gather(*[_render(r, l) for r, l in zip(results, letters)]))
@@ -0,0 +1,38 @@
+import hashlib
+import json
+import threading
+from typing import Optional
+
+from cachetools import TTLCache
+
+
+class LLMCache:
+    """In-process TTL + LRU cache of raw LLM responses.
+
+    Prompts are sent at temperature 0.1 and are fully determined by the input
+    text, so a repeated prompt can reuse the earlier answer instead of paying
+    for another round-trip. Only successful responses are stored.
+    """
+
+    def __init__(self, maxsize: int = 10_000, ttl: float = 3600):
+        self.enabled = maxsize > 0
+        self._cache = TTLCache(maxsize=max(1, maxsize), ttl=ttl)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def cache_key(model: str, prompt: str, json_expected: bool = False) -> str:
+        payload = json.dumps({"model": model, "prompt": prompt, "json_expected": json_expected}, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            return self._cache.get(key)
+
+    def set(self, key: str, value: str) -> None:
+        if not self.enabled or not value:
+            return
+        with self._lock:
+            self._cache[key] = value
+
@@ -1,18 +1,38 @@
-import base64
-import io
-import json
+import asyncio
+import hashlib
 import re
-import wave
+import struct
+import time
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
+import httpx
+import orjson
 from google import genai
 from google.genai import types
 from google.genai.types import HarmCategory, HarmBlockThreshold
 
-from config import logger, groq_client
-from utils import EMAIL_RE
+from config import (
+    logger,
+    groq_client,
+    groq_async_client,
+    GEMINI_LIMITER,
+    GROQ_LIMITER,
+    LLM_CACHE_SIZE,
+    LLM_CACHE_TTL_SECONDS,
+    LLM_CONCURRENCY,
+    LLM_REQUEST_TIMEOUT,
+)
+from llm_cache import LLMCache
+from rate_limiter import estimate_tokens, retry_after_from_exception
+from utils import EMAIL_RE, compile_untrusted
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
 
 GEMINI_SAFETY_SETTINGS = [
     {
@@ -34,86 +54,297 @@ GEMINI_SAFETY_SETTINGS = [
 ]
 
 
-def call_llm_with_fallback(prompt: str, json_expected: bool = False, groq_model: str = "llama3-70b-8192") -> str:
+# Fallback-path regexes, compiled once at import. The ones scanning whole resumes
+# go through compile_untrusted (RE2 when available).
+_SKILL_PATTERNS = [compile_untrusted(p, re.IGNORECASE) for p in (
+    r'\b[A-Z][a-z]+(?:\.[js|py|rb]+)?\b',
+    r'\b[A-Z]{2,}\b',
+    r'\b\w+(?:JS|SQL|DB|API|UI|UX)\b',
+    r'\b(?:v?\d+\.?\d*)\s*(?:years?|yrs?|months?|mos?)\s+(?:of\s+)?(\w+)',
+)]
+_DATE_PATTERNS = [compile_untrusted(p, re.IGNORECASE) for p in (
+    r'(\d{4})\s*[-–—]\s*(present|current|\d{4})',
+    r'(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s+(\d{4})\s*[-–—]\s*(present|current|(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s+\d{4})',
+)]
+# A whole line holding a capitalised name, optionally behind a "Name:" label.
+# Horizontal whitespace only, so a match never runs across lines.
+_NAME_RE = compile_untrusted(
+    r'^[ \t]*(?:Name:[ \t]*)?([A-Z][a-z]+(?:[ \t]+(?:[A-Z][a-z]+|[A-Z]\.?)){1,3})[ \t\r]*$',
+    re.MULTILINE,
+)
+_NAME_SCAN_CHARS = 2000
+_YEAR_RE = re.compile(r'\d{4}')
+_BULLET_PREFIX_RE = re.compile(r"^[\-\u2022\*]+\s*")
+_LINE_BREAKS_RE = re.compile(r"[\r\n]+")
+_DOC_TITLE_RE = re.compile(r"\b(Curriculum Vitae|CV|Resume|Profile)\b", re.I)
+_WHITESPACE_RE = re.compile(r"\s+")
+_EMAIL_PREFIX_SPLIT_RE = re.compile(r'[._\-\d]+')
+_FILENAME_SEPARATORS_RE = re.compile(r'[_\-.]+')
+_DIGITS_RE = re.compile(r'\d+')
+_MARKDOWN_MARKS_RE = re.compile(r"[#*]")
+
+_FALLBACK_TECH_TERMS = (
+    'Python', 'JavaScript', 'Java', 'React', 'Node.js', 'SQL', 'AWS', 'Docker',
+    'Kubernetes', 'Git', 'Linux', 'API', 'REST', 'MongoDB', 'PostgreSQL',
+    'HTML', 'CSS', 'Machine Learning', 'Data Science', 'DevOps', 'Agile'
+)
+
+_TECH_TERMS_AUTOMATON = None
+if ahocorasick is not None:
+    _TECH_TERMS_AUTOMATON = ahocorasick.Automaton()
+    for _term in _FALLBACK_TECH_TERMS:
+        _TECH_TERMS_AUTOMATON.add_word(_term.lower(), _term)
+    _TECH_TERMS_AUTOMATON.make_automaton()
+
+GEMINI_MODEL = "gemini-2.5-flash"
+GROQ_MODEL = "llama3-70b-8192"
+GROQ_SYSTEM_PROMPT = ("You are a helpful assistant specialized in resume analysis and job matching. "
+                      "If the user asks for JSON, you must return valid JSON.")
+
+# One client (HTTP transport + credentials) shared by every Gemini call
+try:
+    _GENAI_CLIENT = genai.Client()
+except Exception as e:
+    logger.warning(f"Gemini client could not be initialised: {e}")
+    _GENAI_CLIENT = None
+
+
+def _gemini_client() -> genai.Client:
+    if _GENAI_CLIENT is None:
+        raise RuntimeError("Gemini client is not configured; check GOOGLE_API_KEY.")
+    return _GENAI_CLIENT
+
+
+# Caps how many async LLM requests (Gemini plus any Groq fallback) are in flight at once;
+# request and token pacing is left to GEMINI_LIMITER / GROQ_LIMITER
+_LLM_SEMAPHORE = asyncio.Semaphore(LLM_CONCURRENCY)
+# Gemini attempts after a timeout before falling through to Groq
+GEMINI_TIMEOUT_RETRIES = 1
+
+LLM_CACHE = LLMCache(maxsize=LLM_CACHE_SIZE, ttl=LLM_CACHE_TTL_SECONDS)
+
+
+def _llm_cache_key(prompt: str, json_expected: bool, groq_model: str = GROQ_MODEL) -> str:
+    return LLMCache.cache_key(f"{GEMINI_MODEL}|{groq_model}", prompt, json_expected)
+
+
+# Built once; the same two configs serve every Gemini text call
+_GEN_CFG_TEXT = types.GenerateContentConfig(safety_settings=GEMINI_SAFETY_SETTINGS, temperature=0.1)
+_GEN_CFG_JSON = types.GenerateContentConfig(safety_settings=GEMINI_SAFETY_SETTINGS, temperature=0.1,
+                                            response_mime_type="application/json")
+
+
+def _gemini_config(json_expected: bool) -> types.GenerateContentConfig:
+    return _GEN_CFG_JSON if json_expected else _GEN_CFG_TEXT
+
+
+@lru_cache(maxsize=8)
+def _gemini_config_with_timeout(json_expected: bool, request_timeout: float) -> types.GenerateContentConfig:
+    # HttpOptions.timeout is in milliseconds
+    http_options = types.HttpOptions(timeout=int(request_timeout * 1000))
+    return _gemini_config(json_expected).model_copy(update={"http_options": http_options})
+
+
+def _llm_result(raw: str, json_expected: bool) -> Any:
+    return orjson.loads(raw) if json_expected else raw
+
+
+def _accept_gemini_response(resp, json_expected: bool) -> Optional[Tuple[str, Any]]:
+    """Return ``(raw text, result)`` if the Gemini response is usable, or None to fall back to Groq."""
+    raw = getattr(resp, 'text', None)
+    raw = raw.strip() if raw else ""
+
+    if not raw:
+        logger.warning("Gemini returned empty response; attempting fallback.")
+        return None
     try:
-        client = genai.Client()
+        return raw, _llm_result(raw, json_expected)
+    except Exception as e:
+        logger.warning(f"Gemini returned invalid JSON: {e}. Falling back.")
+        return None
+
+
+def _groq_call_kwargs(prompt: str, json_expected: bool, groq_model: str) -> Dict[str, Any]:
+    call_kwargs = {
+        "model": groq_model,
+        "messages": [
+            {"role": "system", "content": GROQ_SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ],
+        "temperature": 0.1,
+        "max_tokens": 8192,
+        "top_p": 1,
+    }
+    if json_expected:
+        call_kwargs["response_format"] = {"type": "json_object"}
+    return call_kwargs
 
-        config_params = {
-            "safety_settings": GEMINI_SAFETY_SETTINGS,
-            "temperature": 0.1,
-        }
-        if json_expected:
-            config_params["response_mime_type"] = "application/json"
 
-        gen_config = types.GenerateContentConfig(**config_params)
+def _accept_groq_response(completion, json_expected: bool) -> Tuple[str, Any]:
+    raw_out = completion.choices[0].message.content.strip()
 
-        resp = client.models.generate_content(
-            model="gemini-2.5-flash",
-            contents=prompt,
-            config=gen_config
-        )
+    if not raw_out:
+        raise RuntimeError("Groq returned an empty response")
+
+    return raw_out, _llm_result(raw_out, json_expected)
+
+
+def _gemini_generate_with_timeout(client, prompt: str, json_expected: bool, prompt_tokens: int,
+                                  request_timeout: float):
+    # The HTTP client enforces the timeout itself, so a hung call gives its thread back
+    config = _gemini_config_with_timeout(json_expected, request_timeout)
+    for attempt in range(GEMINI_TIMEOUT_RETRIES + 1):
+        GEMINI_LIMITER.acquire_blocking(prompt_tokens)
+        try:
+            return client.models.generate_content(model=GEMINI_MODEL, contents=prompt, config=config)
+        except httpx.TimeoutException:
+            logger.warning(f"Gemini call timed out after {request_timeout}s (attempt {attempt + 1}).")
+    raise TimeoutError(f"Gemini did not respond within {request_timeout}s")
+
+
+async def _gemini_generate_with_timeout_async(client, prompt: str, json_expected: bool, prompt_tokens: int,
+                                              request_timeout: float):
+    for attempt in range(GEMINI_TIMEOUT_RETRIES + 1):
+        await GEMINI_LIMITER.acquire(prompt_tokens)
+        try:
+            return await asyncio.wait_for(
+                client.aio.models.generate_content(
+                    model=GEMINI_MODEL,
+                    contents=prompt,
+                    config=_gemini_config(json_expected)
+                ),
+                timeout=request_timeout
+            )
+        except asyncio.TimeoutError:
+            logger.warning(f"Gemini call timed out after {request_timeout}s (attempt {attempt + 1}).")
+    raise TimeoutError(f"Gemini did not respond within {request_timeout}s")
+
+
+def call_llm_with_fallback(prompt: str, json_expected: bool = False, groq_model: str = GROQ_MODEL,
+                           request_timeout: float = LLM_REQUEST_TIMEOUT) -> Any:
+    """Gemini with Groq fallback.
+
+    Returns the response text ("" on failure), or with ``json_expected`` the
+    already-parsed JSON value (None on failure).
+    """
+    failed = None if json_expected else ""
+    cache_key = _llm_cache_key(prompt, json_expected, groq_model)
+    cached = LLM_CACHE.get(cache_key)
+    if cached is not None:
+        return _llm_result(cached, json_expected)
+
+    prompt_tokens = estimate_tokens(prompt)
+    try:
+        client = _gemini_client()
+        resp = _gemini_generate_with_timeout(client, prompt, json_expected, prompt_tokens, request_timeout)
 
-        raw = getattr(resp, 'text', None)
-        raw = raw.strip() if raw else ""
-
-        if raw:
-            if json_expected:
-                try:
-                    json.loads(raw)
-                    return raw
-                except Exception as e:
-                    logger.warning(f"Gemini returned invalid JSON: {e}. Falling back.")
-            else:
-                return raw
-        else:
-            logger.warning("Gemini returned empty response; attempting fallback.")
+        accepted = _accept_gemini_response(resp, json_expected)
+        if accepted is not None:
+            LLM_CACHE.set(cache_key, accepted[0])
+            return accepted[1]
 
     except Exception as e:
+        GEMINI_LIMITER.defer(retry_after_from_exception(e))
         logger.warning(f"Gemini call failed: {e}. Attempting fallback to Groq.")
 
     if not groq_client:
         logger.error("Groq fallback requested but client is not configured.")
-        return ""
-
-    messages = [
-        {"role": "system",
-         "content": "You are a helpful assistant specialized in resume analysis and job matching. If the user asks for JSON, you must return valid JSON."},
-        {"role": "user", "content": prompt}
-    ]
+        return failed
 
     try:
-        call_kwargs = {
-            "model": groq_model,
-            "messages": messages,
-            "temperature": 0.1,
-            "max_tokens": 8192,
-            "top_p": 1,
-        }
-        if json_expected:
-            call_kwargs["response_format"] = {"type": "json_object"}
+        GROQ_LIMITER.acquire_blocking(prompt_tokens)
+        completion = groq_client.chat.completions.create(**_groq_call_kwargs(prompt, json_expected, groq_model))
+        raw_out, result = _accept_groq_response(completion, json_expected)
+        LLM_CACHE.set(cache_key, raw_out)
+        return result
 
-        completion = groq_client.chat.completions.create(**call_kwargs)
-        raw_out = completion.choices[0].message.content.strip()
+    except Exception as e:
+        GROQ_LIMITER.defer(retry_after_from_exception(e))
+        logger.error(f"Groq fallback also failed: {e}")
+        return failed
 
-        if not raw_out:
-            raise RuntimeError("Groq returned an empty response")
 
-        if json_expected:
-            json.loads(raw_out)
+async def call_llm_with_fallback_async(prompt: str, json_expected: bool = False,
+                                       groq_model: str = GROQ_MODEL,
+                                       request_timeout: float = LLM_REQUEST_TIMEOUT) -> Any:
+    """Non-blocking twin of ``call_llm_with_fallback`` for use on the event loop."""
+    failed = None if json_expected else ""
+    cache_key = _llm_cache_key(prompt, json_expected, groq_model)
+    cached = LLM_CACHE.get(cache_key)
+    if cached is not None:
+        return _llm_result(cached, json_expected)
 
-        return raw_out
+    prompt_tokens = estimate_tokens(prompt)
+    async with _LLM_SEMAPHORE:
+        try:
+            client = _gemini_client()
+            resp = await _gemini_generate_with_timeout_async(client, prompt, json_expected, prompt_tokens,
+                                                             request_timeout)
 
-    except Exception as e:
-        logger.error(f"Groq fallback also failed: {e}")
-        return ""
+            accepted = _accept_gemini_response(resp, json_expected)
+            if accepted is not None:
+                LLM_CACHE.set(cache_key, accepted[0])
+                return accepted[1]
 
+        except Exception as e:
+            GEMINI_LIMITER.defer(retry_after_from_exception(e))
+            logger.warning(f"Gemini call failed: {e}. Attempting fallback to Groq.")
 
-def extract_skills_with_gemini(text: str, role: str = "job_description", max_skills: int = 60) -> List[str]:
-    prompt = f"""
-You are an expert technical recruiter with deep knowledge of modern technology stacks and job requirements.
+        if not groq_async_client:
+            logger.error("Groq fallback requested but client is not configured.")
+            return failed
 
-Analyze the following {role} and extract ALL technical skills, tools, technologies, and requirements mentioned.
-Be comprehensive and include:
+        try:
+            await GROQ_LIMITER.acquire(prompt_tokens)
+            completion = await groq_async_client.chat.completions.create(
+                **_groq_call_kwargs(prompt, json_expected, groq_model)
+            )
+            raw_out, result = _accept_groq_response(completion, json_expected)
+            LLM_CACHE.set(cache_key, raw_out)
+            return result
+
+        except Exception as e:
+            GROQ_LIMITER.defer(retry_after_from_exception(e))
+            logger.error(f"Groq fallback also failed: {e}")
+            return failed
+
+
+# JD skill lists are re-requested whenever the same job description is re-posted;
+# keep successful LLM extractions around for a while instead of paying another call.
+JD_SKILLS_CACHE_TTL_SECONDS = 30 * 60
+JD_SKILLS_CACHE_MAX_ENTRIES = 128
+_jd_skills_cache: Dict[Tuple[str, str, int], Tuple[float, List[str]]] = {}
+
+
+def _jd_skills_cache_key(text: str, role: str, max_skills: int) -> Tuple[str, str, int]:
+    digest = hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+    return digest, role, max_skills
+
+
+def _get_cached_jd_skills(key: Tuple[str, str, int]) -> Optional[List[str]]:
+    entry = _jd_skills_cache.get(key)
+    if entry is None:
+        return None
+    stamp, skills = entry
+    if time.monotonic() - stamp > JD_SKILLS_CACHE_TTL_SECONDS:
+        _jd_skills_cache.pop(key, None)
+        return None
+    return list(skills)
+
+
+def _store_cached_jd_skills(key: Tuple[str, str, int], skills: List[str]) -> None:
+    now = time.monotonic()
+    if len(_jd_skills_cache) >= JD_SKILLS_CACHE_MAX_ENTRIES:
+        expired = [k for k, (stamp, _) in _jd_skills_cache.items() if now - stamp > JD_SKILLS_CACHE_TTL_SECONDS]
+        for k in expired:
+            _jd_skills_cache.pop(k, None)
+        while len(_jd_skills_cache) >= JD_SKILLS_CACHE_MAX_ENTRIES:
+            _jd_skills_cache.pop(next(iter(_jd_skills_cache)), None)
+    _jd_skills_cache[key] = (now, list(skills))
+
+
+# Prompt sections shared by the single-purpose prompts and the combined resume prompt
+_SKILL_EXTRACTION_GUIDELINES = """Be comprehensive and include:
 - Programming languages and versions
 - Frameworks and libraries  
 - Databases and storage systems
@@ -129,7 +360,42 @@ IMPORTANT GUIDELINES:
 - For job descriptions: include both required and preferred skills
 - For resumes: include skills from experience, projects, and education sections
 - Don't exclude a skill just because it appears in a different context
-- Include industry-standard abbreviations and their full forms
+- Include industry-standard abbreviations and their full forms"""
+
+_EXPERIENCE_JSON_SCHEMA = """{
+    "total_years_experience": "<number>",
+    "technical_years_experience": "<number>",
+    "most_recent_role": {"title": "...", "company": "..."},
+    "key_achievements": ["...", "..."],
+    "technologies_used": ["...", "..."]
+}"""
+
+_NAME_HINTS = """- Names at the top of the document
+- Headers or titles indicating personal information
+- Email addresses that might contain name information
+- Professional signatures"""
+
+
+def _experience_extraction_guidelines() -> str:
+    return f"""Extract:
+1. Total years of professional experience (sum all professional roles, don't double-count overlapping periods)
+2. Years of relevant technical experience (programming, software development, technical roles only)
+3. Most recent job title and company
+4. Key achievements with quantified impact
+5. Technology stack and tools used across all positions
+
+Guidelines:
+- Only count professional full-time experience, not internships or part-time unless specifically mentioned as substantial
+- For date ranges like "2020-Present", use current date ({datetime.now().year}) for calculations
+- Be conservative but fair in estimating partial years"""
+
+
+def _skills_prompt(text: str, role: str, max_skills: int) -> str:
+    return f"""
+You are an expert technical recruiter with deep knowledge of modern technology stacks and job requirements.
+
+Analyze the following {role} and extract ALL technical skills, tools, technologies, and requirements mentioned.
+{_SKILL_EXTRACTION_GUIDELINES}
 
 Return a valid JSON object with exactly one key: "skills" containing an array of strings.
 Limit to the {max_skills} most relevant and important skills, prioritized by:
@@ -142,115 +408,104 @@ Input ({role}):
 
 Return only the JSON object, no other text.
 """
-    try:
-        raw = call_llm_with_fallback(prompt, json_expected=True)
-        if not raw:
-            raise Exception("Empty LLM response")
 
-        parsed = json.loads(raw)
-        skills = parsed.get("skills", []) if isinstance(parsed, dict) else []
 
-        clean_skills = []
-        for skill in skills:
-            if isinstance(skill, str) and len(skill.strip()) > 1:
-                clean_skill = skill.strip()
-                if not any(clean_skill.lower() == existing.lower() for existing in clean_skills):
-                    clean_skills.append(clean_skill)
+def _parse_skills_response(parsed: Any, max_skills: int) -> List[str]:
+    if parsed is None:
+        raise Exception("Empty LLM response")
 
-        return clean_skills[:max_skills]
+    return _clean_skill_list(parsed.get("skills", []) if isinstance(parsed, dict) else [], max_skills)
+
+
+def _clean_skill_list(skills: Any, max_skills: int) -> List[str]:
+    if not isinstance(skills, list):
+        return []
+
+    clean_skills = []
+    seen = set()
+    for skill in skills:
+        if not isinstance(skill, str):
+            continue
+        clean_skill = skill.strip()
+        if len(clean_skill) <= 1:
+            continue
+        key = clean_skill.lower()
+        if key in seen:
+            continue
+        seen.add(key)
+        clean_skills.append(clean_skill)
+        if len(clean_skills) == max_skills:
+            break
+
+    return clean_skills
 
-    except Exception as e:
-        logger.warning(f"LLM skill extraction failed: {e}, using fallback method")
 
+def _fallback_skills(text: str, max_skills: int) -> List[str]:
     fallback_skills = set()
-    patterns = [
-        r'\b[A-Z][a-z]+(?:\.[js|py|rb]+)?\b',
-        r'\b[A-Z]{2,}\b',
-        r'\b\w+(?:JS|SQL|DB|API|UI|UX)\b',
-        r'\b(?:v?\d+\.?\d*)\s*(?:years?|yrs?|months?|mos?)\s+(?:of\s+)?(\w+)',
-    ]
 
-    for pattern in patterns:
-        matches = re.findall(pattern, text, re.IGNORECASE)
+    for pattern in _SKILL_PATTERNS:
+        matches = pattern.findall(text)
         for match in matches:
             if isinstance(match, tuple):
                 match = match[-1]
             if len(match) > 2 and not match.isdigit():
                 fallback_skills.add(match)
 
-    tech_terms = [
-        'Python', 'JavaScript', 'Java', 'React', 'Node.js', 'SQL', 'AWS', 'Docker',
-        'Kubernetes', 'Git', 'Linux', 'API', 'REST', 'MongoDB', 'PostgreSQL',
-        'HTML', 'CSS', 'Machine Learning', 'Data Science', 'DevOps', 'Agile'
-    ]
-
     text_lower = text.lower()
-    for term in tech_terms:
-        if term.lower() in text_lower:
+    if _TECH_TERMS_AUTOMATON is not None:
+        # One pass over the text reports every (possibly overlapping) term occurrence
+        for _, term in _TECH_TERMS_AUTOMATON.iter(text_lower):
             fallback_skills.add(term)
+    else:
+        for term in _FALLBACK_TECH_TERMS:
+            if term.lower() in text_lower:
+                fallback_skills.add(term)
 
     return list(fallback_skills)[:max_skills]
 
 
-def extract_experience_with_enhanced_analysis(resume_text: str) -> Dict[str, Any]:
-    # FIX: The entire JSON example block is now wrapped in {{ and }} to escape the braces.
-    prompt = f"""
-You are an expert resume analyzer. Analyze the professional experience in this resume and provide detailed information.
+async def extract_skills_with_gemini_async(text: str, role: str = "job_description",
+                                           max_skills: int = 60) -> List[str]:
+    if role == "resume":
+        return (await extract_resume_bundle_async(text, max_skills=max_skills))["skills"]
 
-Extract:
-1. Total years of professional experience (sum all professional roles, don't double-count overlapping periods)
-2. Years of relevant technical experience (programming, software development, technical roles only)
-3. Most recent job title and company
-4. Key achievements with quantified impact
-5. Technology stack and tools used across all positions
-
-Guidelines:
-- Only count professional full-time experience, not internships or part-time unless specifically mentioned as substantial
-- For date ranges like "2020-Present", use current date ({datetime.now().year}) for calculations
-- Be conservative but fair in estimating partial years
-
-Return valid JSON with these exact keys:
-{{
-    "total_years_experience": "<number>",
-    "technical_years_experience": "<number>",
-    "most_recent_role": {{"title": "...", "company": "..."}},
-    "key_achievements": ["...", "..."],
-    "technologies_used": ["...", "..."]
-}}
+    cache_key = _jd_skills_cache_key(text, role, max_skills) if role == "job_description" else None
+    if cache_key is not None:
+        cached = _get_cached_jd_skills(cache_key)
+        if cached is not None:
+            return cached
 
-Resume text:
-\"\"\"{resume_text[:4000]}\"\"\"
-"""
     try:
-        raw = call_llm_with_fallback(prompt, json_expected=True)
-        if raw:
-            parsed = json.loads(raw)
-            if isinstance(parsed, dict):
-                return parsed
+        prompt = _skills_prompt(text, role, max_skills)
+        response = await call_llm_with_fallback_async(prompt, json_expected=True)
+        clean_skills = _parse_skills_response(response, max_skills)
+        if cache_key is not None:
+            _store_cached_jd_skills(cache_key, clean_skills)
+        return clean_skills
+
     except Exception as e:
-        logger.warning(f"Enhanced experience extraction failed: {e}")
+        logger.warning(f"LLM skill extraction failed: {e}, using fallback method")
+
+    return _fallback_skills(text, max_skills)
 
-    # Fallback logic... (remains the same)
+
+def _fallback_experience(resume_text: str) -> Dict[str, Any]:
     current_year = datetime.now().year
     total_months = 0
-    date_patterns = [
-        r'(\d{4})\s*[-–—]\s*(present|current|\d{4})',
-        r'(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s+(\d{4})\s*[-–—]\s*(present|current|(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s+\d{4})'
-    ]
 
-    for pattern in date_patterns:
-        matches = re.finditer(pattern, resume_text, re.IGNORECASE)
+    for pattern in _DATE_PATTERNS:
+        matches = pattern.finditer(resume_text)
         for match in matches:
             try:
                 # Robustly handle different match group lengths from regex patterns
                 groups = match.groups()
-                start_year = int(re.search(r'\d{4}', groups[0]).group()) if not groups[0].isdigit() else int(groups[0])
+                start_year = int(_YEAR_RE.search(groups[0]).group()) if not groups[0].isdigit() else int(groups[0])
                 end_str = groups[-1].lower()
 
                 if 'present' in end_str or 'current' in end_str:
                     end_year = current_year
                 else:
-                    end_year_match = re.search(r'\d{4}', end_str)
+                    end_year_match = _YEAR_RE.search(end_str)
                     end_year = int(end_year_match.group()) if end_year_match else start_year
 
                 years_diff = max(0, end_year - start_year)
@@ -269,89 +524,211 @@ Resume text:
     }
 
 
-def extract_name_with_gemini(resume_text: str, filename: Optional[str] = None) -> str:
-    def clean_name_candidate(s: str) -> str:
-        s = s.strip()
-        s = re.sub(r"^[\-\u2022\*]+\s*", "", s)
-        s = re.sub(r"[\r\n]+", " ", s)
-        s = re.sub(r"\b(Curriculum Vitae|CV|Resume|Profile)\b", "", s, flags=re.I).strip()
-        s = re.sub(r"\s+", " ", s)
-        s = s.strip(" \t\n,:;.-")
-        return s
+async def extract_experience_with_enhanced_analysis_async(resume_text: str) -> Dict[str, Any]:
+    return (await extract_resume_bundle_async(resume_text))["experience"]
 
-    try:
-        # FIX: Escaped the curly braces for the JSON examples with {{ and }}
-        prompt = f"""
-Extract the candidate's full name from this resume. Look for:
-- Names at the top of the document
-- Headers or titles indicating personal information
-- Email addresses that might contain name information
-- Professional signatures
 
-Return only JSON: {{"name": "Full Name"}} or {{"name": ""}} if unclear.
+def _clean_name_candidate(s: str) -> str:
+    s = s.strip()
+    s = _BULLET_PREFIX_RE.sub("", s)
+    s = _LINE_BREAKS_RE.sub(" ", s)
+    s = _DOC_TITLE_RE.sub("", s).strip()
+    s = _WHITESPACE_RE.sub(" ", s)
+    s = s.strip(" \t\n,:;.-")
+    return s
 
-Resume text:
-\"\"\"{resume_text[:2000]}\"\"\"
-"""
-        raw = call_llm_with_fallback(prompt, json_expected=True)
-        if raw:
-            parsed = json.loads(raw)
-            name = parsed.get("name", "") if isinstance(parsed, dict) else ""
-            name = clean_name_candidate(str(name))
-            if name and len(name.split()) >= 2:
-                return name
-    except Exception:
-        pass
-
-    # Fallback logic... (remains the same)
-    lines = [ln.strip() for ln in resume_text.splitlines()[:15] if ln.strip()]
-    name_patterns = [
-        r'^([A-Z][a-z]+(?:\s+[A-Z][a-z]+)+)',
-        r'^([A-Z][a-z]+(?:\s+[A-Z]\.?\s*)+[A-Z][a-z]+)',
-        r'Name:\s*([A-Z][a-z]+(?:\s+[A-Z][a-z]+)+)',
-    ]
-    for line in lines:
-        for pattern in name_patterns:
-            match = re.search(pattern, line)
-            if match:
-                candidate = clean_name_candidate(match.group(1))
-                if candidate and 2 <= len(candidate.split()) <= 4:
-                    return candidate
+
+def _validated_name(name: Any) -> Optional[str]:
+    name = _clean_name_candidate(str(name))
+    if name and len(name.split()) >= 2:
+        return name
+    return None
+
+
+def _fallback_name(resume_text: str, filename: Optional[str] = None) -> str:
+    for match in _NAME_RE.finditer(resume_text[:_NAME_SCAN_CHARS]):
+        candidate = _clean_name_candidate(match.group(1))
+        if candidate and 2 <= len(candidate.split()) <= 4:
+            return candidate
     emails = EMAIL_RE.findall(resume_text)
     if emails:
         prefix = emails[0].split("@")[0]
-        parts = re.split(r'[._\-\d]+', prefix)
+        parts = _EMAIL_PREFIX_SPLIT_RE.split(prefix)
         parts = [p.capitalize() for p in parts if p and p.isalpha() and len(p) > 1]
         if len(parts) >= 2:
             return " ".join(parts[:3])
     if filename:
         base = Path(filename).stem
-        base_clean = re.sub(r'[_\-.]+', ' ', base).strip()
-        base_clean = re.sub(r'\d+', '', base_clean).strip()
+        base_clean = _FILENAME_SEPARATORS_RE.sub(' ', base).strip()
+        base_clean = _DIGITS_RE.sub('', base_clean).strip()
         if base_clean and 2 <= len(base_clean.split()) <= 4:
             return " ".join([w.capitalize() for w in base_clean.split()])
     return "Unknown Candidate"
 
 
-async def generate_speech_from_text(text_to_speak: str) -> Dict[str, str]:
-    cleaned_text = re.sub(r"[#*]", "", text_to_speak)
+async def extract_name_with_gemini_async(resume_text: str, filename: Optional[str] = None) -> str:
+    return (await extract_resume_bundle_async(resume_text, filename=filename))["name"]
+
+
+def _resume_bundle_prompt(resume_text: str, max_skills: int, job_description: Optional[str] = None,
+                          jd_max_skills: int = 50) -> str:
+    jd_section = jd_key = jd_input = ""
+    if job_description:
+        jd_section = f"""
+4. JOB DESCRIPTION SKILLS: separately, ALL technical skills, tools, technologies, and requirements asked for
+in the job description below, following the same skill guidelines.
+Limit to the {jd_max_skills} most relevant and important skills.
+"""
+        jd_key = ',\n    "jd_skills": ["...", "..."]'
+        jd_input = f"""
+Job description:
+\"\"\"{job_description[:4000]}\"\"\"
+"""
+
+    return f"""
+You are an expert technical recruiter and resume analyzer. Analyze the resume below and extract, in one pass,
+the candidate's name, their technical skills and their professional experience.
+
+1. NAME: the candidate's full name. Look for:
+{_NAME_HINTS}
+
+2. SKILLS: ALL technical skills, tools, technologies, and qualifications mentioned.
+{_SKILL_EXTRACTION_GUIDELINES}
+Limit to the {max_skills} most relevant and important skills.
+
+3. EXPERIENCE:
+{_experience_extraction_guidelines()}
+{jd_section}
+Return a valid JSON object with exactly these keys:
+{{
+    "name": "Full Name, or an empty string if unclear",
+    "skills": ["...", "..."],
+    "experience": {_EXPERIENCE_JSON_SCHEMA}{jd_key}
+}}
+
+Resume text:
+\"\"\"{resume_text[:4000]}\"\"\"
+{jd_input}
+Return only the JSON object, no other text.
+"""
+
+
+def _parse_resume_bundle(parsed: Any, resume_text: str, filename: Optional[str],
+                         max_skills: int) -> Optional[Dict[str, Any]]:
+    """Validate the combined response; fields that are missing or unusable get the local fallback."""
+    if not isinstance(parsed, dict):
+        return None
+
+    name = _validated_name(parsed.get("name", ""))
+    skills = _clean_skill_list(parsed.get("skills"), max_skills)
+    experience = parsed.get("experience")
+    # Only a profile whose every field came from the response is worth caching
+    from_llm = bool(name) and bool(skills) and isinstance(experience, dict)
+
+    if not name:
+        name = _fallback_name(resume_text, filename)
+    if not skills:
+        skills = _fallback_skills(resume_text, max_skills)
+    if not isinstance(experience, dict):
+        experience = _fallback_experience(resume_text)
+    return {"name": name, "skills": skills, "experience": experience, "from_llm": from_llm}
+
+
+def _bundle_jd_request(job_description: Optional[str], jd_max_skills: int
+                       ) -> Tuple[Optional[str], Optional[Tuple[str, str, int]], Optional[List[str]]]:
+    """(JD text to add to the bundle prompt or None, cache key, already cached JD skills)."""
+    if not job_description:
+        return None, None, None
+    cache_key = _jd_skills_cache_key(job_description, "job_description", jd_max_skills)
+    cached = _get_cached_jd_skills(cache_key)
+    return (None if cached is not None else job_description), cache_key, cached
+
+
+def _bundle_jd_skills(parsed: Any, cache_key: Tuple[str, str, int], jd_max_skills: int) -> Optional[List[str]]:
+    jd_skills = _clean_skill_list(parsed.get("jd_skills"), jd_max_skills) if isinstance(parsed, dict) else []
+    if not jd_skills:
+        return None
+    _store_cached_jd_skills(cache_key, jd_skills)
+    return jd_skills
+
+
+async def extract_resume_bundle_async(resume_text: str, filename: Optional[str] = None, max_skills: int = 80,
+                                      job_description: Optional[str] = None,
+                                      jd_max_skills: int = 50) -> Dict[str, Any]:
+    """Name, skills and experience from a single LLM request.
+
+    Returns ``{"name": str, "skills": [...], "experience": {...}, "jd_skills": [...] or None,
+    "from_llm": bool}``. With ``job_description`` (and no cached JD skills) the same request
+    also lists the JD's skills; ``jd_skills`` is None when that was not possible. If the
+    combined request fails outright, every field comes from the regex heuristics and
+    ``from_llm`` is False.
+    """
+    jd_text, jd_cache_key, jd_skills = _bundle_jd_request(job_description, jd_max_skills)
+    try:
+        prompt = _resume_bundle_prompt(resume_text, max_skills, jd_text, jd_max_skills)
+        response = await call_llm_with_fallback_async(prompt, json_expected=True)
+        bundle = _parse_resume_bundle(response, resume_text, filename, max_skills)
+        if bundle is not None:
+            if jd_text:
+                jd_skills = _bundle_jd_skills(response, jd_cache_key, jd_max_skills)
+            bundle["jd_skills"] = jd_skills
+            return bundle
+    except Exception as e:
+        logger.warning(f"Combined resume extraction failed: {e}; using fallback methods")
+
+    return {
+        "name": _fallback_name(resume_text, filename),
+        "skills": _fallback_skills(resume_text, max_skills),
+        "experience": _fallback_experience(resume_text),
+        "jd_skills": jd_skills,
+        "from_llm": False,
+    }
+
+
+# Canonical 44-byte header for the raw PCM16 mono 24 kHz audio returned by Gemini TTS;
+# only the RIFF size (offset 4) and data size (offset 40) change per clip.
+TTS_SAMPLE_RATE = 24000
+_WAV_HEADER_TEMPLATE = struct.pack(
+    "<4sI4s4sIHHIIHH4sI",
+    b"RIFF", 0, b"WAVE", b"fmt ", 16, 1, 1, TTS_SAMPLE_RATE, TTS_SAMPLE_RATE * 2, 2, 16, b"data", 0,
+)
+
+
+TTS_MODEL = "gemini-2.5-flash-preview-tts"
+_TTS_CFG = types.GenerateContentConfig(
+    response_modalities=["AUDIO"],
+    speech_config=types.SpeechConfig(
+        voice_config=types.VoiceConfig(
+            prebuilt_voice_config=types.PrebuiltVoiceConfig(
+                voice_name="Charon",
+            )
+        )
+    ),
+)
+
+
+def _wav_header(data_size: int) -> bytearray:
+    header = bytearray(_WAV_HEADER_TEMPLATE)
+    struct.pack_into("<I", header, 4, 36 + data_size)
+    struct.pack_into("<I", header, 40, data_size)
+    return header
+
+
+async def generate_speech_from_text(text_to_speak: str) -> Dict[str, Any]:
+    """Audio for ``text_to_speak`` as ``{"bytes": ..., "format": ...}``; bytes are empty on failure."""
+    cleaned_text = _MARKDOWN_MARKS_RE.sub("", text_to_speak)
     logger.info(f"Generating audio for text: '{cleaned_text[:100]}...'")
 
     try:
-        client = genai.Client()
-        response = client.models.generate_content(
-            model="gemini-2.5-flash-preview-tts",
-            contents=f"Read the following professional assessment clearly: {cleaned_text}",
-            config=types.GenerateContentConfig(
-                response_modalities=["AUDIO"],
-                speech_config=types.SpeechConfig(
-                    voice_config=types.VoiceConfig(
-                        prebuilt_voice_config=types.PrebuiltVoiceConfig(
-                            voice_name="Charon",
-                        )
-                    )
-                ),
+        client = _gemini_client()
+        await GEMINI_LIMITER.acquire(estimate_tokens(cleaned_text))
+        response = await asyncio.wait_for(
+            client.aio.models.generate_content(
+                model=TTS_MODEL,
+                contents=f"Read the following professional assessment clearly: {cleaned_text}",
+                config=_TTS_CFG,
             ),
+            timeout=LLM_REQUEST_TIMEOUT
         )
 
         try:
@@ -363,52 +740,46 @@ async def generate_speech_from_text(text_to_speak: str) -> Dict[str, str]:
 
         if not audio_bytes:
             logger.error("TTS returned empty audio bytes.")
-            return {"b64": "", "format": "wav"}
+            return {"bytes": b"", "format": "wav"}
 
         fmt = detect_audio_format(audio_bytes)
         final_bytes = audio_bytes
 
         if fmt == "raw":
-            buf = io.BytesIO()
-            with wave.open(buf, "wb") as wf:
-                wf.setnchannels(1)
-                wf.setsampwidth(2)
-                wf.setframerate(24000)
-                wf.writeframes(audio_bytes)
-            final_bytes = buf.getvalue()
+            final_bytes = b"".join((_wav_header(len(audio_bytes)), audio_bytes))
             fmt = "wav"
 
-        return {"b64": base64.b64encode(final_bytes).decode("utf-8"), "format": fmt}
+        return {"bytes": final_bytes, "format": fmt}
 
     except Exception as e:
+        GEMINI_LIMITER.defer(retry_after_from_exception(e))
         logger.error(f"Failed to generate TTS audio: {e}")
-        return {"b64": "", "format": "wav"}
+        return {"bytes": b"", "format": "wav"}
 
 
 def detect_audio_format(data: bytes) -> str:
     if not data or len(data) < 4:
         return "raw"
-    header = data[:12]
-    if header.startswith(b"RIFF"):
+    # startswith checks the buffer in place; no header copies
+    if data.startswith(b"RIFF"):
         return "wav"
-    if header.startswith(b"ID3") or header[:2] == b"\xff\xfb":
+    if data.startswith((b"ID3", b"\xff\xfb")):
         return "mp3"
-    if header.startswith(b"OggS"):
+    if data.startswith(b"OggS"):
         return "ogg"
     return "raw"
 
 
-def generate_enhanced_llm_justification(candidate_name: str,
-                                        job_description: str,
-                                        component_scores: Dict[str, float],
-                                        skill_analysis: Dict[str, Any],
-                                        experience_data: Dict[str, Any],
-                                        final_score_0_10: float) -> Dict[str, Any]:
+def _justification_prompt(candidate_name: str,
+                          job_description: str,
+                          component_scores: Dict[str, float],
+                          skill_analysis: Dict[str, Any],
+                          experience_data: Dict[str, Any],
+                          final_score_0_10: float) -> str:
     matched_skills = skill_analysis.get('matched_skills', [])
-    missing_skills = [s for s in skill_analysis.get('all_jd_skills', []) if s not in matched_skills]
 
     # FIX: Escaped the entire JSON example structure with {{ and }}
-    prompt = f"""
+    return f"""
 You are a Senior Technical Hiring Manager conducting a thorough and FAIR evaluation of a candidate.
 
 IMPORTANT SCORING GUIDELINES:
@@ -473,21 +844,22 @@ Provide a comprehensive evaluation as JSON that is CONSISTENT with the {final_sc
 
 CRITICAL: Your recommendation decision MUST align with the {final_score_0_10}/10 score using the decision rules above.
 """
-    try:
-        raw_response = call_llm_with_fallback(prompt, json_expected=True)
-        if not raw_response:
-            raise Exception("LLM justification call returned empty.")
-
-        # ... The rest of the function remains the same ...
-        parsed = json.loads(raw_response)
-        if isinstance(parsed, dict):
-            # ... Logic to enforce decision consistency ...
-            return parsed
 
-    except Exception as e:
-        logger.warning(f"Enhanced LLM justification failed: {e}")
 
-    # Fallback logic... (remains the same)
+def _parse_justification_response(parsed: Any) -> Optional[Dict[str, Any]]:
+    if parsed is None:
+        raise Exception("LLM justification call returned empty.")
+
+    if isinstance(parsed, dict):
+        return parsed
+    return None
+
+
+def _fallback_justification(skill_analysis: Dict[str, Any], experience_data: Dict[str, Any],
+                            final_score_0_10: float) -> Dict[str, Any]:
+    matched_skills = skill_analysis.get('matched_skills', [])
+    missing_skills = [s for s in skill_analysis.get('all_jd_skills', []) if s not in matched_skills]
+
     if final_score_0_10 >= 7.5:
         decision = "Strong Recommend"
     elif final_score_0_10 >= 6.5:
@@ -530,3 +902,21 @@ CRITICAL: Your recommendation decision MUST align with the {final_score_0_10}/10
                                                                            "Strong Recommend"] else "Look for candidates with stronger skill matches"
         ]
     }
+
+
+async def generate_enhanced_llm_justification_async(candidate_name: str,
+                                                    job_description: str,
+                                                    component_scores: Dict[str, float],
+                                                    skill_analysis: Dict[str, Any],
+                                                    experience_data: Dict[str, Any],
+                                                    final_score_0_10: float) -> Dict[str, Any]:
+    prompt = _justification_prompt(candidate_name, job_description, component_scores, skill_analysis,
+                                   experience_data, final_score_0_10)
+    try:
+        parsed = _parse_justification_response(await call_llm_with_fallback_async(prompt, json_expected=True))
+        if parsed is not None:
+            return parsed
+    except Exception as e:
+        logger.warning(f"Enhanced LLM justification failed: {e}")
+
+    return _fallback_justification(skill_analysis, experience_data, final_score_0_10)
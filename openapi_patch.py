@@ -3,9 +3,13 @@ from config import logger
 
 
 def custom_openapi(app):
-    if app.openapi_schema:
-        return app.openapi_schema
+    # Built once per app; the docs page requests the schema on every load.
+    if app.openapi_schema is None:
+        app.openapi_schema = _build_openapi_schema(app)
+    return app.openapi_schema
+
 
+def _build_openapi_schema(app):
     openapi_schema = get_openapi(
         title=app.title,
         version=app.version,
@@ -32,6 +36,7 @@ def custom_openapi(app):
                 "properties": {
                     "job_description": {"title": "job_description", "type": "string"},
                     "include_audio": {"title": "include_audio", "type": "boolean"},
+                    "include_feedback": {"title": "include_feedback", "type": "boolean", "default": True},
                     "resumes": {
                         "title": "resumes",
                         "type": "array",
@@ -45,7 +50,8 @@ def custom_openapi(app):
             body["encoding"] = {
                 "resumes": {"contentType": "application/octet-stream", "style": "form", "explode": False},
                 "job_description": {"contentType": "text/plain"},
-                "include_audio": {"contentType": "text/plain"}
+                "include_audio": {"contentType": "text/plain"},
+                "include_feedback": {"contentType": "text/plain"}
             }
 
             patched = True
@@ -58,5 +64,4 @@ def custom_openapi(app):
         logger.warning("custom_openapi(): did not find /batch-rate in generated OpenAPI paths. Paths: %s",
                        list(openapi_schema.get("paths", {}).keys())[:50])
 
-    app.openapi_schema = openapi_schema
-    return app.openapi_schema
+    return openapi_schema
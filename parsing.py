@@ -1,87 +1,147 @@
+import asyncio
 import io
 import os
-import re
-import tempfile
+import threading
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional
 
 import docx
 import fitz
 from fastapi import UploadFile, HTTPException
 
-from config import logger
+from config import CPU_POOL, PROCESS_POOL_MIN_BYTES, logger
+from utils import compile_untrusted
+
+# One pass equivalent to: CR/CRLF -> LF, then 3+ line breaks -> blank line, then
+# runs of spaces/tabs -> one space. Break runs count CRLF as a single break.
+_NORMALIZE_RE = compile_untrusted(r"(?P<breaks>(?:\r\n?|\n){3,})|(?P<eol>\r\n?)|[ \t]+")
+
+
+def _normalize_replacement(match) -> str:
+    if match.group("breaks"):
+        return "\n\n"
+    if match.group("eol"):
+        return "\n"
+    return " "
+
+# MuPDF is not thread-safe. Small uploads are parsed on to_thread workers, so those
+# take turns; in the single-threaded CPU_POOL workers the lock is never contended.
+_FITZ_LOCK = threading.Lock()
 
 
 def extract_text_from_pdf_bytes(pdf_bytes: bytes) -> str:
-    full_text = []
-    try:
-        doc = fitz.open(stream=pdf_bytes, filetype="pdf")
-    except Exception as e:
-        logger.error(f"Error opening PDF: {e}")
-        raise HTTPException(status_code=400, detail="Invalid PDF file.")
+    with _FITZ_LOCK:
+        try:
+            doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+        except Exception as e:
+            logger.error(f"Error opening PDF: {e}")
+            raise HTTPException(status_code=400, detail="Invalid PDF file.")
+
+        with doc:
+            return _extract_text_from_pdf_document(doc)
 
-    for page in doc:
-        page_texts = []
 
-        simple_text = page.get_text().strip()
-        if simple_text:
-            page_texts.append(simple_text)
+def extract_text_from_pdf_file(pdf_path: Path) -> str:
+    # MuPDF reads straight from disk, so the upload never has to sit in memory.
+    with _FITZ_LOCK:
+        try:
+            doc = fitz.open(str(pdf_path), filetype="pdf")
+        except Exception as e:
+            logger.error(f"Error opening PDF: {e}")
+            raise HTTPException(status_code=400, detail="Invalid PDF file.")
+
+        with doc:
+            return _extract_text_from_pdf_document(doc)
 
-        blocks = page.get_text("blocks")
-        if blocks:
-            sorted_blocks = sorted(blocks, key=lambda b: (round(b[1] / 10) * 10, b[0]))
-            block_text = "\n".join([b[4].strip() for b in sorted_blocks if len(b) > 4 and b[4].strip()])
-            if block_text:
-                page_texts.append(block_text)
 
-        if page_texts:
-            best_text = max(page_texts, key=len)
-            full_text.append(best_text)
+def _extract_text_from_pdf_document(doc) -> str:
+    # Pages are read serially: MuPDF is not thread-safe and holds the GIL while it works.
+    # Throughput comes from parsing different files in CPU_POOL.
+    full_text = _extract_page_range(doc, range(doc.page_count))
 
     combined_text = "\n\n".join(full_text)
-    combined_text = re.sub(r"\r\n?", "\n", combined_text)
-    combined_text = re.sub(r"\n{3,}", "\n\n", combined_text)
-    combined_text = re.sub(r"[ \t]+", " ", combined_text)
-    return combined_text
+    return _NORMALIZE_RE.sub(_normalize_replacement, combined_text)
+
+
+def _extract_page_range(doc, pages: range) -> List[str]:
+    texts = []
+    for page_index in pages:
+        page_text = _extract_page_text(doc[page_index])
+        if page_text:
+            texts.append(page_text)
+    return texts
+
+
+def _extract_page_text(page) -> str:
+    # Reading-order blocks are the default; plain text is only extracted for
+    # pages where the block layout comes back empty. The TextPage is built once
+    # and shared by both calls.
+    textpage = page.get_textpage(flags=fitz.TEXTFLAGS_TEXT)
+
+    blocks = page.get_text("blocks", textpage=textpage)
+    if blocks:
+        sorted_blocks = sorted(blocks, key=lambda b: (round(b[1] / 10) * 10, b[0]))
+        block_text = "\n".join([b[4].strip() for b in sorted_blocks if len(b) > 4 and b[4].strip()])
+        if block_text:
+            return block_text
+
+    return page.get_text(textpage=textpage).strip()
 
 
 def extract_text_from_docx_bytes(docx_bytes: bytes) -> str:
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".docx") as tmp:
-        tmp.write(docx_bytes)
-        tmp.flush()
-        tmp_path = tmp.name
+    # python-docx reads from any file-like object; no need to round-trip through disk.
+    return _extract_text_from_docx_document(docx.Document(io.BytesIO(docx_bytes)))
+
+
+def extract_text_from_docx_file(docx_path: Path) -> str:
+    return _extract_text_from_docx_document(docx.Document(str(docx_path)))
 
-    try:
-        document = docx.Document(tmp_path)
-
-        paragraphs = []
-        for paragraph in document.paragraphs:
-            text = paragraph.text.strip()
-            if text:
-                paragraphs.append(text)
-
-        tables = []
-        for table in document.tables:
-            for row in table.rows:
-                row_text = []
-                for cell in row.cells:
-                    cell_text = cell.text.strip()
-                    if cell_text:
-                        row_text.append(cell_text)
-                if row_text:
-                    tables.append(" | ".join(row_text))
-
-        all_text = paragraphs + tables
-    finally:
-        try:
-            os.remove(tmp_path)
-        except Exception:
-            pass
 
+def _extract_text_from_docx_document(document) -> str:
+    paragraphs = []
+    for paragraph in document.paragraphs:
+        text = paragraph.text.strip()
+        if text:
+            paragraphs.append(text)
+
+    tables = []
+    for table in document.tables:
+        for row in table.rows:
+            row_text = []
+            for cell in row.cells:
+                cell_text = cell.text.strip()
+                if cell_text:
+                    row_text.append(cell_text)
+            if row_text:
+                tables.append(" | ".join(row_text))
+
+    all_text = paragraphs + tables
     return "\n".join(all_text)
 
 
-def parse_resume_file(upload_file: UploadFile) -> Dict[str, Any]:
+def _extract_text_from_path(path: str, is_pdf: bool) -> str:
+    # Runs inside pool workers: re-raise as a plain exception so it always pickles back.
+    try:
+        return extract_text_from_pdf_file(Path(path)) if is_pdf else extract_text_from_docx_file(Path(path))
+    except Exception as e:
+        raise RuntimeError(str(e)) from None
+
+
+def _extract_text_from_bytes(contents: bytes, is_pdf: bool) -> str:
+    try:
+        return extract_text_from_pdf_bytes(contents) if is_pdf else extract_text_from_docx_bytes(contents)
+    except Exception as e:
+        raise RuntimeError(str(e)) from None
+
+
+async def _run_extraction(size: int, func, *args) -> str:
+    # Small files: a thread is cheaper than shipping work to another process.
+    if size < PROCESS_POOL_MIN_BYTES:
+        return await asyncio.to_thread(func, *args)
+    return await asyncio.get_running_loop().run_in_executor(CPU_POOL, func, *args)
+
+
+async def parse_resume_file(upload_file: UploadFile, resume_path: Optional[Path] = None) -> Dict[str, Any]:
     filename = upload_file.filename or "uploaded_resume"
     fname_low = filename.lower()
 
@@ -91,15 +151,22 @@ def parse_resume_file(upload_file: UploadFile) -> Dict[str, Any]:
             detail=f"Invalid file type for '{filename}'. Only PDF and DOCX files are allowed."
         )
 
-    contents = upload_file.file.read()
-    if len(contents) == 0:
+    # When the caller already spooled the upload to disk, parse straight from that file.
+    if resume_path is not None:
+        size = os.path.getsize(resume_path)
+    else:
+        # UploadFile.read() runs the (possibly disk-spooled) read in a worker thread.
+        contents = await upload_file.read()
+        size = len(contents)
+    if size == 0:
         raise HTTPException(status_code=400, detail="Empty file uploaded.")
 
+    is_pdf = fname_low.endswith(".pdf")
     try:
-        if fname_low.endswith(".pdf"):
-            text = extract_text_from_pdf_bytes(contents)
+        if resume_path is not None:
+            text = await _run_extraction(size, _extract_text_from_path, str(resume_path), is_pdf)
         else:
-            text = extract_text_from_docx_bytes(contents)
+            text = await _run_extraction(size, _extract_text_from_bytes, contents, is_pdf)
     except Exception as e:
         logger.error(f"Error processing file {filename}: {e}")
         raise HTTPException(status_code=500, detail=f"Error processing file: {str(e)}")
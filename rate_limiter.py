@@ -0,0 +1,128 @@
+import asyncio
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
+from typing import Any, Mapping, Optional
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+
+@lru_cache(maxsize=1)
+def _get_encoding():
+    # Loaded on first use rather than at import: on a cold cache tiktoken downloads
+    # the BPE file, which would otherwise stall every process importing this module.
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.get_encoding("o200k_base")
+    except Exception:
+        # BPE tables not available offline
+        return None
+
+
+def estimate_tokens(text: str) -> int:
+    """Token count used for TPM accounting and prompt budgeting.
+
+    Gemini and Llama tokenizers differ from OpenAI's BPE, but it is far closer
+    than the ~4 characters per token fallback used when tiktoken is unavailable.
+    """
+    if not text:
+        return 1
+    encoding = _get_encoding()
+    if encoding is not None:
+        return max(1, len(encoding.encode(text, disallowed_special=())))
+    return max(1, len(text) // 4)
+
+
+def parse_retry_after(headers: Optional[Mapping[str, Any]]) -> float:
+    """Return the delay in seconds requested by a ``Retry-After`` header, or 0."""
+    if not headers:
+        return 0.0
+    value = headers.get("retry-after") or headers.get("Retry-After")
+    if not value:
+        return 0.0
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        pass
+    try:
+        retry_at = parsedate_to_datetime(str(value))
+        return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def retry_after_from_exception(exc: BaseException) -> float:
+    response = getattr(exc, "response", None)
+    return parse_retry_after(getattr(response, "headers", None))
+
+
+class AsyncTokenBucket:
+    """Proactive request/token pacing for a single LLM provider.
+
+    Capacity refills continuously at ``rpm`` requests and ``tpm`` tokens per
+    minute. Each caller reserves its share up front and sleeps until the
+    reservation is covered, so concurrent callers queue up instead of bursting
+    into 429s. State is guarded by a thread lock so the same bucket can be
+    shared between coroutines and the synchronous client code.
+    """
+
+    def __init__(self, rpm: int, tpm: Optional[int] = None):
+        self.rpm = max(1, int(rpm))
+        self.tpm = int(tpm) if tpm else None
+        self._requests = float(self.rpm)
+        self._tokens = float(self.tpm or 0)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated
+        self._updated = now
+        self._requests = min(float(self.rpm), self._requests + elapsed * self.rpm / 60.0)
+        if self.tpm:
+            self._tokens = min(float(self.tpm), self._tokens + elapsed * self.tpm / 60.0)
+
+    def _reserve(self, tokens: int) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+
+            self._requests -= 1
+            wait = -self._requests * 60.0 / self.rpm if self._requests < 0 else 0.0
+
+            if self.tpm:
+                self._tokens -= min(max(1, tokens), self.tpm)
+                if self._tokens < 0:
+                    wait = max(wait, -self._tokens * 60.0 / self.tpm)
+
+            return max(wait, self._blocked_until - now)
+
+    async def acquire(self, tokens: int = 1) -> None:
+        wait = self._reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def acquire_blocking(self, tokens: int = 1) -> None:
+        wait = self._reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+
+    def defer(self, seconds: float) -> None:
+        """Hold back every subsequent acquisition for ``seconds`` (e.g. after a 429)."""
+        if seconds <= 0:
+            return
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+    async def wait_for_retry_after(self, headers: Optional[Mapping[str, Any]]) -> float:
+        seconds = parse_retry_after(headers)
+        if seconds > 0:
+            self.defer(seconds)
+            await asyncio.sleep(seconds)
+        return seconds
@@ -1,13 +1,121 @@
 import re
-from typing import Any, Dict, List
-
-from skills import find_skill_matches
+from typing import Any, Dict, List, NamedTuple, Optional
+
+import numpy as np
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+from skills import JDSkillIndex, build_jd_skill_index, find_skill_matches
+from utils import compile_untrusted
+
+_IMPACT_PATTERNS = [compile_untrusted(p, re.IGNORECASE) for p in (
+    r'\d+%\s*(?:increase|improvement|reduction|growth|faster|better)',
+    r'\$\d+[kmb]?\s*(?:saved|revenue|budget|cost)',
+    r'\d+\s*(?:users|customers|clients|projects|applications)',
+    r'(?:increased|improved|reduced|optimized|enhanced).*?\d+',
+    r'\d+x\s*(?:faster|improvement|increase)',
+    r'(?:led|managed)\s+(?:team of\s+)?\d+',
+)]
+
+_PROJECT_PATTERNS = [compile_untrusted(p, re.IGNORECASE) for p in (
+    r'\b(?:project|projects|portfolio|github|personal\s+work)\b',
+    r'\b(?:built|created|developed).*?(?:application|app|website|system|tool)\b',
+    r'\b(?:side\s+project|open\s+source|hackathon|competition)\b',
+)]
+
+# Evidence snippets mentioning any of these count as skills used in context.
+# Plain substrings, like the old per-keyword checks: "led" also hits "enabled".
+_CONTEXT_RE = re.compile(r'experience|worked|developed|built|created|managed|led|implemented', re.IGNORECASE)
+
+# Piecewise-linear years -> score curve; flat at 1.0 from 5 years on
+_EXPERIENCE_YEARS = np.array([0.0, 0.5, 1.0, 3.0, 5.0])
+_EXPERIENCE_SCORES = np.array([0.0, 0.2, 0.4, 0.8, 1.0])
+
+_ACTION_VERBS = ('developed', 'built', 'created', 'designed', 'implemented', 'optimized', 'improved', 'led',
+                 'managed')
+
+_EDUCATION_INDICATORS = {
+    'phd': 1.0,
+    'ph.d': 1.0,
+    'doctorate': 1.0,
+    'master': 0.9,
+    'm.s': 0.9,
+    'msc': 0.9,
+    'mba': 0.8,
+    'bachelor': 0.7,
+    'b.s': 0.7,
+    'bsc': 0.7,
+    'associate': 0.5,
+    'certification': 0.4,
+    'bootcamp': 0.4,
+    'diploma': 0.3
+}
+
+_JOB_TYPES = {
+    'frontend': ['frontend', 'front-end', 'react', 'vue', 'angular', 'javascript', 'html', 'css'],
+    'backend': ['backend', 'back-end', 'api', 'server', 'database', 'python', 'java', 'node'],
+    'fullstack': ['fullstack', 'full-stack', 'full stack'],
+    'devops': ['devops', 'infrastructure', 'aws', 'docker', 'kubernetes', 'ci/cd'],
+    'data': ['data science', 'machine learning', 'analytics', 'python', 'sql', 'statistics'],
+    'mobile': ['mobile', 'ios', 'android', 'react native', 'flutter', 'swift', 'kotlin']
+}
+
+_SCAN_KEYWORDS = sorted(set(_ACTION_VERBS) | set(_EDUCATION_INDICATORS) |
+                        {kw for keywords in _JOB_TYPES.values() for kw in keywords},
+                        key=lambda kw: (-len(kw), kw))
+# The lookahead tries every position, longest keyword first; shorter keywords
+# hidden inside a longer hit (e.g. "react" in "react native") come from _KEYWORD_IMPLIES.
+_KEYWORD_SCAN_RE = re.compile("(?=(" + "|".join(map(re.escape, _SCAN_KEYWORDS)) + "))")
+_KEYWORD_IMPLIES = {kw: frozenset(other for other in _SCAN_KEYWORDS if other in kw) for kw in _SCAN_KEYWORDS}
+
+# With pyahocorasick the same set is matched by one automaton that reports overlapping hits directly
+_KEYWORD_AUTOMATON = None
+if ahocorasick is not None:
+    _KEYWORD_AUTOMATON = ahocorasick.Automaton()
+    for _keyword in _SCAN_KEYWORDS:
+        _KEYWORD_AUTOMATON.add_word(_keyword, _keyword)
+    _KEYWORD_AUTOMATON.make_automaton()
+
+
+def _keywords_present(text_lower: str) -> frozenset:
+    """All scan keywords that occur as substrings of ``text_lower``, in one pass."""
+    if _KEYWORD_AUTOMATON is not None:
+        return frozenset(keyword for _, keyword in _KEYWORD_AUTOMATON.iter(text_lower))
+    hits = set(_KEYWORD_SCAN_RE.findall(text_lower))
+    return frozenset().union(*(_KEYWORD_IMPLIES[kw] for kw in hits))
+
+
+class JDContext(NamedTuple):
+    """Everything scoring needs from the job description, computed once per JD and shared by all resumes."""
+    skill_index: JDSkillIndex
+    # JD keyword hits per job type, for job types mentioned at all
+    job_type_counts: Dict[str, int]
+
+
+def precompute_jd_context(job_desc: str, jd_skills: List[str]) -> JDContext:
+    jd_keywords = _keywords_present(job_desc.lower())
+    job_type_counts = {}
+    for job_type, keywords in _JOB_TYPES.items():
+        count = sum(1 for keyword in keywords if keyword in jd_keywords)
+        if count > 0:
+            job_type_counts[job_type] = count
+    return JDContext(build_jd_skill_index(jd_skills), job_type_counts)
 
 
 def compute_enhanced_component_scores(job_desc: str, resume_text: str,
                                       jd_skills: List[str], resume_skills: List[str],
-                                      experience_data: Dict[str, Any]) -> Dict[str, Any]:
-    skill_analysis = find_skill_matches(jd_skills, resume_text, resume_skills)
+                                      experience_data: Dict[str, Any],
+                                      jd_context: Optional[JDContext] = None) -> Dict[str, Any]:
+    # jd_context must come from precompute_jd_context(job_desc, jd_skills) for these same arguments
+    if jd_context is None:
+        jd_context = precompute_jd_context(job_desc, jd_skills)
+
+    resume_lower = resume_text.lower()
+    skill_analysis = find_skill_matches(jd_skills, resume_text, resume_skills, resume_text_lower=resume_lower,
+                                        jd_index=jd_context.skill_index)
 
     base_match_rate = skill_analysis['match_rate']
     confidence_weighted_score = 0
@@ -24,44 +132,18 @@ def compute_enhanced_component_scores(job_desc: str, resume_text: str,
     if total_matched_skills > 0:
         for skill in skill_analysis['matched_skills']:
             evidence = skill_analysis['skill_evidence'].get(skill, [])
-            if evidence:
-                experience_keywords = ['experience', 'worked', 'developed', 'built', 'created', 'managed', 'led',
-                                       'implemented']
-                for snippet in evidence:
-                    snippet_lower = snippet.lower()
-                    if any(keyword in snippet_lower for keyword in experience_keywords):
-                        skills_with_context += 1
-                        break
+            if any(_CONTEXT_RE.search(snippet) for snippet in evidence):
+                skills_with_context += 1
 
     skill_context_score = skills_with_context / max(1, total_matched_skills) if total_matched_skills > 0 else 0
 
     total_years = experience_data.get('total_years_experience', 0)
     technical_years = experience_data.get('technical_years_experience', 0)
 
-    if technical_years >= 5:
-        experience_duration_score = 1.0
-    elif technical_years >= 3:
-        experience_duration_score = 0.8 + (technical_years - 3) * 0.1
-    elif technical_years >= 1:
-        experience_duration_score = 0.4 + (technical_years - 1) * 0.2
-    elif technical_years >= 0.5:
-        experience_duration_score = 0.2 + (technical_years - 0.5) * 0.4
-    else:
-        experience_duration_score = technical_years * 0.4
-
-    impact_indicators = [
-        r'\d+%\s*(?:increase|improvement|reduction|growth|faster|better)',
-        r'\$\d+[kmb]?\s*(?:saved|revenue|budget|cost)',
-        r'\d+\s*(?:users|customers|clients|projects|applications)',
-        r'(?:increased|improved|reduced|optimized|enhanced).*?\d+',
-        r'\d+x\s*(?:faster|improvement|increase)',
-        r'(?:led|managed)\s+(?:team of\s+)?\d+',
-    ]
-
-    impact_count = 0
-    for pattern in impact_indicators:
-        matches = re.findall(pattern, resume_text, re.IGNORECASE)
-        impact_count += len(matches)
+    experience_duration_score = float(np.interp(technical_years, _EXPERIENCE_YEARS, _EXPERIENCE_SCORES))
+
+    impact_count = sum(len(pattern.findall(resume_text)) for pattern in _IMPACT_PATTERNS)
+    resume_keywords = _keywords_present(resume_lower)
 
     if impact_count >= 5:
         impact_score = 1.0
@@ -70,63 +152,23 @@ def compute_enhanced_component_scores(job_desc: str, resume_text: str,
     elif impact_count >= 1:
         impact_score = 0.6
     else:
-        action_verbs = ['developed', 'built', 'created', 'designed', 'implemented', 'optimized', 'improved', 'led',
-                        'managed']
-        action_count = sum(1 for verb in action_verbs if verb in resume_text.lower())
+        action_count = sum(1 for verb in _ACTION_VERBS if verb in resume_keywords)
         impact_score = min(0.4, action_count * 0.05)
 
-    project_indicators = [
-        r'\b(?:project|projects|portfolio|github|personal\s+work)\b',
-        r'\b(?:built|created|developed).*?(?:application|app|website|system|tool)\b',
-        r'\b(?:side\s+project|open\s+source|hackathon|competition)\b'
-    ]
-
     project_score = 0
-    for pattern in project_indicators:
-        if re.search(pattern, resume_text, re.IGNORECASE):
+    for pattern in _PROJECT_PATTERNS:
+        if pattern.search(resume_text):
             project_score += 0.3
     project_score = min(1.0, project_score)
 
-    education_indicators = {
-        'phd': 1.0,
-        'ph.d': 1.0,
-        'doctorate': 1.0,
-        'master': 0.9,
-        'm.s': 0.9,
-        'msc': 0.9,
-        'mba': 0.8,
-        'bachelor': 0.7,
-        'b.s': 0.7,
-        'bsc': 0.7,
-        'associate': 0.5,
-        'certification': 0.4,
-        'bootcamp': 0.4,
-        'diploma': 0.3
-    }
-
-    education_score = 0.3
-    resume_lower = resume_text.lower()
-    for term, score in education_indicators.items():
-        if term in resume_lower:
-            education_score = max(education_score, score)
-            break
-
-    job_desc_lower = job_desc.lower()
-    job_types = {
-        'frontend': ['frontend', 'front-end', 'react', 'vue', 'angular', 'javascript', 'html', 'css'],
-        'backend': ['backend', 'back-end', 'api', 'server', 'database', 'python', 'java', 'node'],
-        'fullstack': ['fullstack', 'full-stack', 'full stack'],
-        'devops': ['devops', 'infrastructure', 'aws', 'docker', 'kubernetes', 'ci/cd'],
-        'data': ['data science', 'machine learning', 'analytics', 'python', 'sql', 'statistics'],
-        'mobile': ['mobile', 'ios', 'android', 'react native', 'flutter', 'swift', 'kotlin']
-    }
+    education_score = max((score for term, score in _EDUCATION_INDICATORS.items() if term in resume_keywords),
+                          default=0.3)
 
     job_type_matches = {}
-    for job_type, keywords in job_types.items():
-        job_match_count = sum(1 for keyword in keywords if keyword in job_desc_lower)
-        resume_match_count = sum(1 for keyword in keywords if keyword in resume_lower)
-        if job_match_count > 0:
-            job_type_matches[job_type] = (resume_match_count / len(keywords), job_match_count)
+    for job_type, job_match_count in jd_context.job_type_counts.items():
+        keywords = _JOB_TYPES[job_type]
+        resume_match_count = sum(1 for keyword in keywords if keyword in resume_keywords)
+        job_type_matches[job_type] = (resume_match_count / len(keywords), job_match_count)
 
     relevance_score = 0.5
     if job_type_matches:
@@ -157,21 +199,26 @@ def compute_enhanced_component_scores(job_desc: str, resume_text: str,
     }
 
 
+_SCORE_WEIGHTS = {
+    "skill_match_score": 0.25,
+    "skill_context_score": 0.15,
+    "experience_duration_score": 0.20,
+    "impact_score": 0.10,
+    "project_score": 0.10,
+    "education_score": 0.10,
+    "relevance_score": 0.10
+}
+_WEIGHT_KEYS = tuple(_SCORE_WEIGHTS)
+_WEIGHT_VECTOR = np.array([_SCORE_WEIGHTS[k] for k in _WEIGHT_KEYS])
+
+
 def aggregate_enhanced_scores(component_scores: Dict[str, float]) -> Dict[str, Any]:
-    weights = {
-        "skill_match_score": 0.25,
-        "skill_context_score": 0.15,
-        "experience_duration_score": 0.20,
-        "impact_score": 0.10,
-        "project_score": 0.10,
-        "education_score": 0.10,
-        "relevance_score": 0.10
-    }
+    weights = dict(_SCORE_WEIGHTS)
 
-    total_score = 0.0
-    for component, weight in weights.items():
-        if component in component_scores:
-            total_score += weight * component_scores[component]
+    # Missing components contribute nothing
+    scores = np.fromiter((component_scores.get(k, 0.0) for k in _WEIGHT_KEYS), dtype=np.float64,
+                         count=len(_WEIGHT_KEYS))
+    total_score = float(scores @ _WEIGHT_VECTOR)
 
     score_components = {k: v for k, v in component_scores.items()
                         if k.endswith('_score') and isinstance(v, (int, float))}
@@ -1,46 +1,114 @@
+import asyncio
 import base64
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from fastapi import UploadFile
 
 from config import AUDIO_SAVE_DIR, logger
 from parsing import parse_resume_file
 from llm_utils import (
-    extract_skills_with_gemini,
-    extract_experience_with_enhanced_analysis,
-    extract_name_with_gemini,
+    extract_resume_bundle_async,
+    extract_skills_with_gemini_async,
     generate_speech_from_text,
-    generate_enhanced_llm_justification,
+    generate_enhanced_llm_justification_async,
 )
-from scoring import compute_enhanced_component_scores, aggregate_enhanced_scores
-from feedback import generate_candidate_feedback_pdf
-from utils import sanitize_filename
+from scoring import JDContext, compute_enhanced_component_scores, aggregate_enhanced_scores
+from feedback import generate_candidate_feedback_pdf_async
+from utils import is_recommended, sanitize_filename
+
+
+def needs_feedback_report(result: Dict[str, Any]) -> bool:
+    recommendation = result.get("llm_justification", {}).get("recommendation", {}).get("decision", "").lower()
+    score = result.get("final_score_0_10", 0)
+    # The letter is written for rejections; skip the LLM + PDF work for recommended candidates.
+    if is_recommended(score, recommendation):
+        return False
+    return "not recommended" in recommendation or score < 6.0
+
+
+async def _extract_profile(resume_file: UploadFile, resume_path: Optional[Path] = None,
+                           job_description: Optional[str] = None) -> Tuple[Dict[str, Any], Optional[List[str]]]:
+    parsed = await parse_resume_file(resume_file, resume_path=resume_path)
+    resume_text = parsed["text"]
+    # Name, skills and experience (and JD skills, when asked for) come back from one combined LLM request.
+    bundle = await extract_resume_bundle_async(resume_text, filename=parsed.get("filename"), max_skills=80,
+                                               job_description=job_description, jd_max_skills=50)
+
+    profile = {
+        "text": resume_text,
+        "filename": resume_file.filename or parsed["filename"],
+        "candidate_name": bundle["name"],
+        "resume_skills": bundle["skills"],
+        "experience_data": bundle["experience"],
+        # False when the combined LLM request failed and the fields may be regex fallbacks
+        "from_llm": bundle["from_llm"],
+    }
+    return profile, bundle["jd_skills"]
+
+
+async def extract_resume_profile(resume_file: UploadFile,
+                                 resume_path: Optional[Path] = None) -> Dict[str, Any]:
+    """Parse a resume and run the job-description independent extractions.
+
+    The result only depends on the uploaded file, so callers may cache it and
+    pass it back as ``parsed_resume`` when scoring against other job descriptions.
+    Profiles with ``from_llm`` False hold fallback guesses and should not be cached.
+    """
+    profile, _ = await _extract_profile(resume_file, resume_path=resume_path)
+    return profile
+
+
+async def extract_resume_profile_with_jd_skills(resume_file: UploadFile, job_description: str,
+                                                resume_path: Optional[Path] = None
+                                                ) -> Tuple[Dict[str, Any], List[str]]:
+    """``extract_resume_profile`` plus the JD skills, asked for in the same LLM request.
+
+    Falls back to a separate JD extraction when the combined response has no usable JD skills.
+    The model sees the JD while listing the resume skills, so cache the profile per JD.
+    """
+    profile, jd_skills = await _extract_profile(resume_file, resume_path=resume_path,
+                                                job_description=job_description)
+    if jd_skills is None:
+        jd_skills = await extract_skills_with_gemini_async(job_description, role="job_description", max_skills=50)
+    return profile, jd_skills
 
 
 async def process_single_resume_enhanced(job_description: str,
                                          resume_file: UploadFile,
                                          jd_skills: Optional[List[str]] = None,
-                                         include_audio: bool = False) -> Dict[str, Any]:
-    parsed = parse_resume_file(resume_file)
-    resume_text = parsed["text"]
-    candidate_name = extract_name_with_gemini(resume_text, filename=parsed.get("filename"))
+                                         include_audio: bool = False,
+                                         resume_path: Optional[Path] = None,
+                                         generate_feedback: bool = True,
+                                         parsed_resume: Optional[Dict[str, Any]] = None,
+                                         jd_context: Optional[JDContext] = None) -> Dict[str, Any]:
+    """Score one resume. ``jd_context`` must have been built from ``jd_skills`` when both are given."""
+    if parsed_resume is None and jd_skills is None:
+        parsed_resume, jd_skills = await extract_resume_profile_with_jd_skills(
+            resume_file, job_description, resume_path=resume_path
+        )
+    elif parsed_resume is None:
+        parsed_resume = await extract_resume_profile(resume_file, resume_path=resume_path)
+
+    resume_text = parsed_resume["text"]
+    candidate_name = parsed_resume["candidate_name"]
+    resume_skills = parsed_resume["resume_skills"]
+    experience_data = parsed_resume["experience_data"]
 
     if jd_skills is None:
-        jd_skills_local = extract_skills_with_gemini(job_description, role="job_description", max_skills=50)
+        jd_skills_local = await extract_skills_with_gemini_async(job_description, role="job_description", max_skills=50)
     else:
         jd_skills_local = jd_skills
 
-    resume_skills = extract_skills_with_gemini(resume_text, role="resume", max_skills=80)
-    experience_data = extract_experience_with_enhanced_analysis(resume_text)
-
-    component_scores = compute_enhanced_component_scores(
-        job_description, resume_text, jd_skills_local, resume_skills, experience_data
+    # Regex/fuzzy matching is CPU work; keep it off the event loop
+    component_scores = await asyncio.to_thread(
+        compute_enhanced_component_scores,
+        job_description, resume_text, jd_skills_local, resume_skills, experience_data, jd_context
     )
 
     aggregated_scores = aggregate_enhanced_scores(component_scores)
 
-    llm_justification = generate_enhanced_llm_justification(
+    llm_justification = await generate_enhanced_llm_justification_async(
         candidate_name=candidate_name,
         job_description=job_description,
         component_scores=component_scores,
@@ -65,8 +133,10 @@ async def process_single_resume_enhanced(job_description: str,
             speak_text = f"Assessment for {candidate_name}: {decision}. {summary} Recommended next steps: {' '.join(next_steps[:2])}"
 
             tts_result = await generate_speech_from_text(speak_text)
-            if tts_result and tts_result.get("b64"):
-                tts_b64 = tts_result.get("b64")
+            audio_bytes = tts_result.get("bytes") if tts_result else None
+            if audio_bytes:
+                # Encoded once for the JSON response; the file gets the raw bytes
+                tts_b64 = base64.b64encode(audio_bytes).decode("ascii")
                 audio_format = tts_result.get("format", "wav")
 
                 try:
@@ -74,17 +144,17 @@ async def process_single_resume_enhanced(job_description: str,
                     out_filename = f"{filename_safe}.{audio_format}"
                     out_path = Path(AUDIO_SAVE_DIR) / out_filename
 
-                    with open(out_path, "wb") as f:
-                        f.write(base64.b64decode(tts_b64))
+                    await asyncio.to_thread(out_path.write_bytes, audio_bytes)
                     saved_audio_filename = out_filename
                 except Exception as file_e:
                     logger.warning(f"Failed to save TTS file for {candidate_name}: {file_e}")
         except Exception as e:
             logger.warning(f"TTS generation failed: {e}")
 
+    matched_set = set(component_scores.get("matched_skills", []))
     response = {
         "candidate_name": candidate_name,
-        "filename": parsed["filename"],
+        "filename": resume_file.filename or parsed_resume["filename"],
         "final_score_0_10": aggregated_scores["score_0_10"],
         "final_score_0_100": aggregated_scores["score_0_100"],
         "component_scores": {k: round(v, 3) for k, v in component_scores.items() if k.endswith('_score')},
@@ -97,17 +167,17 @@ async def process_single_resume_enhanced(job_description: str,
         "skill_evidence": component_scores.get("skill_evidence", {}),
         "confidence_scores": component_scores.get("confidence_scores", {}),
         "match_statistics": component_scores.get("match_statistics", {}),
-        "missing_requirements": [s for s in jd_skills_local if s not in component_scores.get("matched_skills", [])],
+        "missing_requirements": [s for s in jd_skills_local if s not in matched_set],
         "llm_justification": llm_justification,
         "tts_audio_base64": tts_b64,
         "tts_saved_filename": saved_audio_filename,
         "experience_data": experience_data
     }
 
+    # Batch callers pass generate_feedback=False and request the letters together afterwards.
     feedback_report_base64 = None
-    recommendation = llm_justification.get("recommendation", {}).get("decision", "").lower()
-    if "not recommended" in recommendation or aggregated_scores["score_0_10"] < 6.0:
-        pdf_bytes = generate_candidate_feedback_pdf(response)
+    if generate_feedback and needs_feedback_report(response):
+        pdf_bytes = await generate_candidate_feedback_pdf_async(response)
         if pdf_bytes:
             feedback_report_base64 = base64.b64encode(pdf_bytes).decode('utf-8')
 
@@ -1,6 +1,21 @@
 import re
 from difflib import SequenceMatcher
-from typing import Any, Dict, List, Set
+from functools import lru_cache
+from itertools import islice
+from typing import Any, Dict, FrozenSet, List, NamedTuple, Optional, Set
+
+import numpy as np
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+try:
+    from rapidfuzz import process
+    from rapidfuzz.distance import Indel
+except ImportError:
+    process = Indel = None
 
 SKILL_ALIASES = {
     'javascript': ['js', 'ecmascript', 'node.js', 'nodejs', 'node js'],
@@ -79,18 +94,32 @@ SKILL_ALIASES = {
 }
 
 
+# Alias (or canonical name) -> canonical name. A term listed under several
+# canonicals resolves to the first one, matching the old linear scan.
+_ALIAS_TO_CANONICAL: Dict[str, str] = {}
+for _canonical, _aliases in SKILL_ALIASES.items():
+    for _alias in (_canonical, *_aliases):
+        _ALIAS_TO_CANONICAL.setdefault(_alias, _canonical)
+
+_SKILL_PREFIX_RE = re.compile(r'^(using|with|in)\s+')
+_SKILL_SUFFIX_RE = re.compile(r'\s+(programming|development|framework|library|database|tool)$')
+
+
+@lru_cache(maxsize=4096)
 def normalize_skill(skill: str) -> str:
     skill_lower = skill.lower().strip()
-    skill_lower = re.sub(r'^(using|with|in)\s+', '', skill_lower)
-    skill_lower = re.sub(r'\s+(programming|development|framework|library|database|tool)$', '', skill_lower)
-
-    for canonical, aliases in SKILL_ALIASES.items():
-        if skill_lower == canonical or skill_lower in aliases:
-            return canonical
-    return skill_lower
+    skill_lower = _SKILL_PREFIX_RE.sub('', skill_lower)
+    skill_lower = _SKILL_SUFFIX_RE.sub('', skill_lower)
+    return _ALIAS_TO_CANONICAL.get(skill_lower, skill_lower)
 
 
 def create_skill_variants(skill: str) -> Set[str]:
+    return set(_skill_variants(skill))
+
+
+@lru_cache(maxsize=4096)
+def _skill_variants(skill: str) -> FrozenSet[str]:
+    # Cached and shared between callers, hence frozen
     variants = set()
     normalized = normalize_skill(skill)
     variants.add(normalized)
@@ -103,59 +132,151 @@ def create_skill_variants(skill: str) -> Set[str]:
         variants.add(normalized.replace(' ', ''))
         variants.add(normalized.replace(' ', '.'))
         variants.add(normalized.replace(' ', '-'))
-    return variants
+    return frozenset(variants)
+
+
+FUZZY_MATCH_THRESHOLD = 0.85
+MAX_EVIDENCE_SNIPPETS = 3
 
 
 def fuzzy_match_score(text1: str, text2: str) -> float:
+    if Indel is not None:
+        return Indel.normalized_similarity(text1.lower(), text2.lower())
     return SequenceMatcher(None, text1.lower(), text2.lower()).ratio()
 
 
-def find_skill_matches(jd_skills: List[str], resume_text: str, resume_skills: List[str]) -> Dict[str, Any]:
-    resume_text_lower = resume_text.lower()
+def _best_fuzzy_score(jd_variants: List[str], resume_variants: List[str]) -> float:
+    """Best similarity between any pair of (lowercase) variants, or 0.0 below FUZZY_MATCH_THRESHOLD."""
+    best = 0.0
+    for jd_variant in jd_variants:
+        for resume_variant in resume_variants:
+            score = 1.0 if jd_variant == resume_variant else fuzzy_match_score(jd_variant, resume_variant)
+            if score >= FUZZY_MATCH_THRESHOLD and score > best:
+                best = score
+                if best >= 1.0:
+                    return best
+    return best
+
+
+def _fuzzy_scores(jd_variant_lists: List[List[str]], resume_variants: List[str]) -> np.ndarray:
+    """``_best_fuzzy_score`` for each JD skill's variant list against the pooled resume variants."""
+    scores = np.zeros(len(jd_variant_lists))
+    if not jd_variant_lists or not resume_variants:
+        return scores
+
+    if process is None:
+        for i, jd_variants in enumerate(jd_variant_lists):
+            scores[i] = _best_fuzzy_score(jd_variants, resume_variants)
+        return scores
+
+    # Every JD variant against every resume variant in one C call (pairs under the
+    # cutoff come back as 0), then the best row of each skill's block of rows. cdist
+    # defaults to float32; ask for float64 so the scores are the ones Indel returns.
+    rows = [variant for jd_variants in jd_variant_lists for variant in jd_variants]
+    offsets = np.cumsum([0] + [len(jd_variants) for jd_variants in jd_variant_lists[:-1]])
+    grid = process.cdist(rows, resume_variants, scorer=Indel.normalized_similarity,
+                         score_cutoff=FUZZY_MATCH_THRESHOLD, dtype=np.float64)
+    return np.maximum.reduceat(grid.max(axis=1), offsets)
+
+
+class JDSkillIndex(NamedTuple):
+    """JD-side matching data; depends only on the JD skills, so one index serves every resume."""
+    variants: Dict[str, FrozenSet[str]]
+    # pyahocorasick automaton over all non-empty variants (None without pyahocorasick or variants)
+    automaton: Any
+
+
+def build_jd_skill_index(jd_skills: List[str]) -> JDSkillIndex:
+    variants = {jd_skill: _skill_variants(jd_skill) for jd_skill in jd_skills}
+    all_variants = {v for skill_variants in variants.values() for v in skill_variants if v}
+
+    automaton = None
+    if ahocorasick is not None and all_variants:
+        automaton = ahocorasick.Automaton()
+        for variant in all_variants:
+            automaton.add_word(variant, variant)
+        automaton.make_automaton()
+    return JDSkillIndex(variants, automaton)
+
+
+def _variant_occurrences(index: JDSkillIndex, text_lower: str) -> Dict[str, List[int]]:
+    """Start offsets of each JD variant found in ``text_lower``.
+
+    Offsets per variant are non-overlapping, as ``re.finditer`` would report them, and
+    capped at MAX_EVIDENCE_SNIPPETS since only that many snippets are ever kept.
+    """
+    occurrences: Dict[str, List[int]] = {}
+
+    if index.automaton is None:
+        for variant in {v for skill_variants in index.variants.values() for v in skill_variants if v}:
+            if variant in text_lower:
+                matches = islice(re.finditer(re.escape(variant), text_lower), MAX_EVIDENCE_SNIPPETS)
+                occurrences[variant] = [m.start() for m in matches]
+        return occurrences
+
+    # One pass finds every variant of every JD skill; hits arrive ordered by end offset
+    for end, variant in index.automaton.iter(text_lower):
+        start = end - len(variant) + 1
+        starts = occurrences.setdefault(variant, [])
+        if len(starts) < MAX_EVIDENCE_SNIPPETS and (not starts or start >= starts[-1] + len(variant)):
+            starts.append(start)
+    return occurrences
+
+
+def find_skill_matches(jd_skills: List[str], resume_text: str, resume_skills: List[str],
+                       resume_text_lower: Optional[str] = None,
+                       jd_index: Optional[JDSkillIndex] = None) -> Dict[str, Any]:
+    if resume_text_lower is None:
+        resume_text_lower = resume_text.lower()
+    if jd_index is None:
+        jd_index = build_jd_skill_index(jd_skills)
     matched_skills = []
     skill_evidence = {}
     confidence_scores = {}
 
-    for jd_skill in jd_skills:
-        jd_skill_variants = create_skill_variants(jd_skill)
-        best_match_score = 0.0
-        evidence_snippets = []
+    # Only the best pair counts, so every resume skill's variants can be pooled once
+    resume_variants = sorted(set().union(*(_skill_variants(s) for s in resume_skills)))
+
+    occurrences = _variant_occurrences(jd_index, resume_text_lower)
 
-        for variant in jd_skill_variants:
-            if variant in resume_text_lower:
-                best_match_score = max(best_match_score, 1.0)
-                pattern = re.escape(variant)
-                matches = list(re.finditer(pattern, resume_text_lower))
-                for match in matches:
-                    start = max(0, match.start() - 30)
-                    end = min(len(resume_text), match.end() + 30)
+    # Phase 1: exact hits in the text, with their evidence snippets
+    best_scores = np.zeros(len(jd_skills))
+    evidence = []
+    for i, jd_skill in enumerate(jd_skills):
+        evidence_snippets = []
+        for variant in jd_index.variants[jd_skill]:
+            starts = occurrences.get(variant)
+            if starts:
+                best_scores[i] = 1.0
+                # The score is settled; only the first few snippets are kept
+                for match_start in starts[:MAX_EVIDENCE_SNIPPETS - len(evidence_snippets)]:
+                    start = max(0, match_start - 30)
+                    end = min(len(resume_text), match_start + len(variant) + 30)
                     evidence_snippets.append(resume_text[start:end].strip())
+        evidence.append(evidence_snippets)
+
+    # Phase 2: one batched fuzzy pass for the skills without an exact hit (1.0 cannot be beaten)
+    pending = np.flatnonzero(best_scores < 1.0)
+    best_scores[pending] = _fuzzy_scores([sorted(jd_index.variants[jd_skills[i]]) for i in pending],
+                                         resume_variants)
+
+    # Phase 3: partial word overlap for multi-word skills that are still unmatched
+    unmatched = np.flatnonzero(best_scores < 0.5)
+    resume_words = set(resume_text_lower.split()) if len(unmatched) else set()
+    for i in unmatched:
+        jd_words = set(jd_skills[i].lower().split())
+
+        if len(jd_words) > 1:
+            word_matches = jd_words.intersection(resume_words)
+            if len(word_matches) >= len(jd_words) * 0.6:
+                partial_score = len(word_matches) / len(jd_words) * 0.7
+                best_scores[i] = max(best_scores[i], partial_score)
 
-        for resume_skill in resume_skills:
-            resume_variants = create_skill_variants(resume_skill)
-            for jd_variant in jd_skill_variants:
-                for resume_variant in resume_variants:
-                    if jd_variant == resume_variant:
-                        best_match_score = max(best_match_score, 1.0)
-                    else:
-                        fuzzy_score = fuzzy_match_score(jd_variant, resume_variant)
-                        if fuzzy_score >= 0.85:
-                            best_match_score = max(best_match_score, fuzzy_score)
-
-        if best_match_score < 0.5:
-            jd_words = set(jd_skill.lower().split())
-            resume_words = set(resume_text_lower.split())
-
-            if len(jd_words) > 1:
-                word_matches = jd_words.intersection(resume_words)
-                if len(word_matches) >= len(jd_words) * 0.6:
-                    partial_score = len(word_matches) / len(jd_words) * 0.7
-                    best_match_score = max(best_match_score, partial_score)
-
-        if best_match_score >= 0.5:
-            matched_skills.append(jd_skill)
-            skill_evidence[jd_skill] = evidence_snippets[:3]
-            confidence_scores[jd_skill] = best_match_score
+    for i in np.flatnonzero(best_scores >= 0.5):
+        jd_skill = jd_skills[i]
+        matched_skills.append(jd_skill)
+        skill_evidence[jd_skill] = evidence[i]
+        confidence_scores[jd_skill] = float(best_scores[i])
 
     return {
         'matched_skills': matched_skills,
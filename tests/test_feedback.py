@@ -0,0 +1,70 @@
+import pytest
+
+import feedback
+from feedback import FEEDBACK_SEPARATOR, generate_feedback_batch
+
+
+def _result(name):
+    return {"candidate_name": name, "final_score_0_10": 4.0, "matched_skills": ["python"]}
+
+
+@pytest.fixture
+def llm(monkeypatch):
+    """Replace the LLM: the batch prompt gets ``llm.batch_reply``; single prompts get a letter naming the candidate."""
+    class FakeLLM:
+        def __init__(self):
+            self.batch_reply = ""
+            self.prompts = []
+
+        def __call__(self, prompt, json_expected=False):
+            self.prompts.append(prompt)
+            if "separate constructive" in prompt:
+                return self.batch_reply
+            for name in ("Ann", "Bob", "Cy"):
+                if f"letter for {name} " in prompt:
+                    return f"single letter for {name}"
+            raise AssertionError("unexpected prompt")
+
+    fake = FakeLLM()
+    monkeypatch.setattr(feedback, "call_llm_with_fallback", fake)
+    return fake
+
+
+def test_letters_map_back_in_candidate_order(llm):
+    llm.batch_reply = f"Dear Ann\n{FEEDBACK_SEPARATOR}\nDear Bob\n{FEEDBACK_SEPARATOR}\nDear Cy"
+    letters = generate_feedback_batch([_result("Ann"), _result("Bob"), _result("Cy")])
+    assert letters == ["Dear Ann", "Dear Bob", "Dear Cy"]
+    assert len(llm.prompts) == 1
+
+
+def test_empty_sections_are_ignored(llm):
+    llm.batch_reply = f"{FEEDBACK_SEPARATOR}\nDear Ann\n{FEEDBACK_SEPARATOR}\n\n{FEEDBACK_SEPARATOR}\nDear Bob\n"
+    assert generate_feedback_batch([_result("Ann"), _result("Bob")]) == ["Dear Ann", "Dear Bob"]
+
+
+@pytest.mark.parametrize("reply", [
+    "Dear Ann, Dear Bob and Dear Cy",
+    f"Dear Ann\n{FEEDBACK_SEPARATOR}\nDear Bob",
+    f"A\n{FEEDBACK_SEPARATOR}\nB\n{FEEDBACK_SEPARATOR}\nC\n{FEEDBACK_SEPARATOR}\nD",
+    "",
+])
+def test_wrong_section_count_falls_back_per_candidate(llm, reply):
+    llm.batch_reply = reply
+    letters = generate_feedback_batch([_result("Ann"), _result("Bob"), _result("Cy")])
+    assert letters == ["single letter for Ann", "single letter for Bob", "single letter for Cy"]
+    assert len(llm.prompts) == 4
+
+
+def test_failed_batch_request_falls_back_per_candidate(monkeypatch):
+    def fake_llm(prompt, json_expected=False):
+        if "separate constructive" in prompt:
+            raise RuntimeError("provider down")
+        return "single letter"
+
+    monkeypatch.setattr(feedback, "call_llm_with_fallback", fake_llm)
+    assert generate_feedback_batch([_result("Ann"), _result("Bob")]) == ["single letter", "single letter"]
+
+
+def test_single_candidate_skips_the_batch_prompt(llm):
+    assert generate_feedback_batch([_result("Bob")]) == ["single letter for Bob"]
+    assert generate_feedback_batch([]) == []
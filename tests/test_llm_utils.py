@@ -0,0 +1,78 @@
+import asyncio
+
+import httpx
+import pytest
+
+import llm_utils
+from llm_utils import _parse_resume_bundle
+
+RESUME = "Jane Doe\njane.doe@example.com\nPython developer, 2018 - 2022 at Acme\n"
+EXPERIENCE = {"total_years_experience": 4, "technical_years_experience": 4}
+
+
+def test_complete_bundle_is_from_llm():
+    bundle = _parse_resume_bundle({"name": "Jane Doe", "skills": ["Python"], "experience": EXPERIENCE},
+                                  RESUME, None, 80)
+    assert bundle == {"name": "Jane Doe", "skills": ["Python"], "experience": EXPERIENCE, "from_llm": True}
+
+
+def test_any_fallback_field_clears_from_llm():
+    for parsed in (
+        {"name": "", "skills": ["Python"], "experience": EXPERIENCE},
+        {"name": "Jane Doe", "skills": [], "experience": EXPERIENCE},
+        {"name": "Jane Doe", "skills": ["Python"], "experience": None},
+    ):
+        bundle = _parse_resume_bundle(parsed, RESUME, None, 80)
+        assert bundle["from_llm"] is False
+        assert bundle["name"] and bundle["skills"] and isinstance(bundle["experience"], dict)
+
+
+def test_non_dict_response_is_rejected():
+    assert _parse_resume_bundle(None, RESUME, None, 80) is None
+    assert _parse_resume_bundle(["Jane Doe"], RESUME, None, 80) is None
+
+
+def test_sync_gemini_call_times_out_at_the_http_layer(monkeypatch):
+    monkeypatch.setattr(llm_utils.GEMINI_LIMITER, "acquire_blocking", lambda tokens: None)
+    configs = []
+
+    class FakeModels:
+        def generate_content(self, model, contents, config):
+            configs.append(config)
+            raise httpx.ReadTimeout("timed out")
+
+    class FakeClient:
+        models = FakeModels()
+
+    with pytest.raises(TimeoutError):
+        llm_utils._gemini_generate_with_timeout(FakeClient(), "prompt", True, 10, 2.5)
+    # One retry after the first timeout, both with the HTTP timeout in milliseconds
+    assert [c.http_options.timeout for c in configs] == [2500, 2500]
+    assert configs[0].response_mime_type == "application/json"
+
+
+def test_failed_bundle_request_uses_fallbacks_without_more_llm_calls(monkeypatch):
+    prompts = []
+
+    async def failing_llm(prompt, json_expected=False):
+        prompts.append(prompt)
+        raise RuntimeError("provider down")
+
+    monkeypatch.setattr(llm_utils, "call_llm_with_fallback_async", failing_llm)
+    bundle = asyncio.run(llm_utils.extract_resume_bundle_async(RESUME, filename="jane_doe.pdf"))
+    assert len(prompts) == 1
+    assert bundle["from_llm"] is False
+    assert bundle["name"] == "Jane Doe"
+    assert bundle["jd_skills"] is None
+    assert isinstance(bundle["experience"], dict)
+
+
+def test_single_field_extractors_read_the_bundle(monkeypatch):
+    async def fake_bundle(resume_text, filename=None, max_skills=80, **kwargs):
+        return {"name": "Jane Doe", "skills": ["Python"][:max_skills], "experience": EXPERIENCE,
+                "jd_skills": None, "from_llm": True}
+
+    monkeypatch.setattr(llm_utils, "extract_resume_bundle_async", fake_bundle)
+    assert asyncio.run(llm_utils.extract_name_with_gemini_async(RESUME)) == "Jane Doe"
+    assert asyncio.run(llm_utils.extract_skills_with_gemini_async(RESUME, role="resume")) == ["Python"]
+    assert asyncio.run(llm_utils.extract_experience_with_enhanced_analysis_async(RESUME)) == EXPERIENCE
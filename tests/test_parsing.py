@@ -0,0 +1,40 @@
+import random
+import re
+
+import pytest
+
+from parsing import _NORMALIZE_RE, _normalize_replacement
+
+
+def _normalize_three_pass(text):
+    # The chain _NORMALIZE_RE replaced
+    text = re.sub(r"\r\n?", "\n", text)
+    text = re.sub(r"\n{3,}", "\n\n", text)
+    return re.sub(r"[ \t]+", " ", text)
+
+
+def _normalize(text):
+    return _NORMALIZE_RE.sub(_normalize_replacement, text)
+
+
+@pytest.mark.parametrize("text", [
+    "",
+    "Jane Doe\r\nPython Developer\r\n",
+    "line one\rline two\r\rline three",
+    "Summary\n\n\n\n\nExperience",
+    "Summary\r\n\r\n\r\n\r\nExperience",
+    "mixed\r\n\n\r\rbreaks",
+    "Skills:\t\tPython,   Go \t SQL",
+    "non\u00a0breaking\u00a0\u00a0space\t\u00a0 kept",
+    " \t\n \t\n \t\n\t ",
+])
+def test_matches_three_pass_normalisation(text):
+    assert _normalize(text) == _normalize_three_pass(text)
+
+
+def test_matches_three_pass_normalisation_on_random_text():
+    rng = random.Random(1234)
+    alphabet = ["\r", "\n", "\r\n", " ", "\t", "\u00a0", "a", "B"]
+    for _ in range(2000):
+        text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 40)))
+        assert _normalize(text) == _normalize_three_pass(text), repr(text)
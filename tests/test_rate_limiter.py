@@ -0,0 +1,114 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import pytest
+
+import rate_limiter
+from rate_limiter import AsyncTokenBucket, estimate_tokens, parse_retry_after
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(rate_limiter.time, "monotonic", fake)
+    return fake
+
+
+def test_reserve_is_free_until_capacity_runs_out(clock):
+    bucket = AsyncTokenBucket(rpm=60, tpm=600)
+    for _ in range(60):
+        assert bucket._reserve(1) == 0.0
+    # One request over a 60 RPM budget waits one second for the refill
+    assert bucket._reserve(1) == pytest.approx(1.0)
+
+
+def test_reserve_waits_for_tokens(clock):
+    bucket = AsyncTokenBucket(rpm=1000, tpm=600)
+    assert bucket._reserve(600) == 0.0
+    # 300 tokens over a 600 TPM budget need 30 s of refill
+    assert bucket._reserve(300) == pytest.approx(30.0)
+
+
+def test_reserve_caps_oversized_requests_at_tpm(clock):
+    bucket = AsyncTokenBucket(rpm=1000, tpm=600)
+    bucket._reserve(600)
+    assert bucket._reserve(10 ** 6) == pytest.approx(60.0)
+
+
+def test_capacity_refills_over_time(clock):
+    bucket = AsyncTokenBucket(rpm=60)
+    for _ in range(60):
+        bucket._reserve(1)
+    clock.now += 30
+    for _ in range(30):
+        assert bucket._reserve(1) == 0.0
+    assert bucket._reserve(1) == pytest.approx(1.0)
+
+
+def test_defer_holds_back_acquisitions(clock):
+    bucket = AsyncTokenBucket(rpm=60)
+    bucket.defer(5)
+    assert bucket._reserve(1) == pytest.approx(5.0)
+    clock.now += 2
+    assert bucket._reserve(1) == pytest.approx(3.0)
+    # A shorter deferral never shortens an existing one
+    bucket.defer(1)
+    assert bucket._reserve(1) == pytest.approx(3.0)
+    bucket.defer(0)
+    bucket.defer(-1)
+    assert bucket._reserve(1) == pytest.approx(3.0)
+
+
+def test_wait_for_retry_after_defers_and_sleeps(clock, monkeypatch):
+    slept = []
+
+    async def fake_sleep(seconds):
+        slept.append(seconds)
+
+    monkeypatch.setattr(rate_limiter.asyncio, "sleep", fake_sleep)
+    bucket = AsyncTokenBucket(rpm=60)
+
+    assert asyncio.run(bucket.wait_for_retry_after({"retry-after": "4"})) == 4.0
+    assert slept == [4.0]
+    assert bucket._reserve(1) == pytest.approx(4.0)
+
+    assert asyncio.run(bucket.wait_for_retry_after({})) == 0.0
+    assert slept == [4.0]
+
+
+def test_parse_retry_after_seconds():
+    assert parse_retry_after({"retry-after": "12"}) == 12.0
+    assert parse_retry_after({"Retry-After": "1.5"}) == 1.5
+    assert parse_retry_after({"retry-after": "-3"}) == 0.0
+    assert parse_retry_after({}) == 0.0
+    assert parse_retry_after(None) == 0.0
+    assert parse_retry_after({"retry-after": "soon"}) == 0.0
+
+
+def test_parse_retry_after_http_date():
+    retry_at = datetime.now(timezone.utc) + timedelta(seconds=120)
+    seconds = parse_retry_after({"retry-after": format_datetime(retry_at, usegmt=True)})
+    assert 110 <= seconds <= 120
+
+    past = datetime.now(timezone.utc) - timedelta(seconds=120)
+    assert parse_retry_after({"retry-after": format_datetime(past, usegmt=True)}) == 0.0
+
+
+def test_estimate_tokens_without_tiktoken(monkeypatch):
+    monkeypatch.setattr(rate_limiter, "tiktoken", None)
+    rate_limiter._get_encoding.cache_clear()
+    try:
+        assert estimate_tokens("") == 1
+        assert estimate_tokens("abc") == 1
+        assert estimate_tokens("x" * 400) == 100
+    finally:
+        rate_limiter._get_encoding.cache_clear()
@@ -0,0 +1,189 @@
+import random
+import re
+
+import pytest
+
+import scoring
+from scoring import (_EDUCATION_INDICATORS, _JOB_TYPES, _KEYWORD_IMPLIES, _SCAN_KEYWORDS, _keywords_present,
+                     aggregate_enhanced_scores, compute_enhanced_component_scores)
+from skills import find_skill_matches
+
+JD = """Senior Full Stack Engineer
+We need a front-end and back-end developer with React, React Native and Node experience.
+You will build APIs, own the database and the CI/CD pipeline on AWS with Docker and Kubernetes.
+Machine learning, analytics and SQL statistics are a plus. Bachelor or Master degree preferred.
+"""
+
+RESUMES = [
+    """Jane Doe - Ph.D in Computer Science
+Led a team of 6 engineers and developed a React Native app used by 20000 users.
+Built a Python API server on AWS; improved latency by 40% and reduced cost by $20k saved.
+Side project: open source Kubernetes operator on GitHub. Enabled CI/CD with Docker.
+""",
+    """John Smith
+B.S. in Information Systems. Bootcamp certification in JavaScript, HTML and CSS.
+Worked on frontend features in Vue and Angular; designed and implemented the fullstack portal.
+""",
+    """Alex Roe
+Analytics and statistics diploma. Data science with SQL.
+Managed spreadsheets and created reports.
+""",
+    "",
+]
+RESUME_SKILLS = [["Python", "React Native", "AWS", "Docker", "Kubernetes"],
+                 ["JavaScript", "HTML", "CSS", "Vue", "Angular"],
+                 ["SQL", "Statistics"],
+                 []]
+JD_SKILLS = ["React", "React Native", "Node.js", "AWS", "Docker", "Kubernetes", "SQL", "Python", "CI/CD"]
+EXPERIENCE = [{"total_years_experience": 7, "technical_years_experience": 6},
+              {"total_years_experience": 2, "technical_years_experience": 1.5},
+              {"total_years_experience": 0.5, "technical_years_experience": 0.4},
+              {}]
+
+
+@pytest.fixture(params=["automaton", "regex"])
+def keyword_scan(request, monkeypatch):
+    """Run the test over both keyword scanners."""
+    if request.param == "automaton":
+        if scoring._KEYWORD_AUTOMATON is None:
+            pytest.skip("pyahocorasick is not installed")
+    else:
+        monkeypatch.setattr(scoring, "_KEYWORD_AUTOMATON", None)
+    return request.param
+
+
+def _keywords_by_substring(text_lower):
+    # The per-keyword checks _keywords_present replaced
+    return frozenset(kw for kw in _SCAN_KEYWORDS if kw in text_lower)
+
+
+def test_implied_keywords_are_substrings():
+    for keyword, implied in _KEYWORD_IMPLIES.items():
+        assert keyword in implied
+        assert implied == {other for other in _SCAN_KEYWORDS if other in keyword}
+    assert {"react", "react native"} <= _KEYWORD_IMPLIES["react native"]
+    assert "java" in _KEYWORD_IMPLIES["javascript"]
+
+
+@pytest.mark.parametrize("text", [JD] + RESUMES + [
+    "react native javascript full-stack ph.d m.sc b.sc",
+    "enabled managed mastered leadership",
+    "ci/cdci/cd backendbackend-end",
+])
+def test_keyword_hits_match_substring_checks(keyword_scan, text):
+    text_lower = text.lower()
+    assert _keywords_present(text_lower) == _keywords_by_substring(text_lower)
+
+
+def test_keyword_hits_match_substring_checks_on_random_text(keyword_scan):
+    rng = random.Random(1234)
+    # Keyword fragments glued together produce overlaps and keywords nested in longer ones
+    pieces = list(_SCAN_KEYWORDS) + [kw[:len(kw) // 2] for kw in _SCAN_KEYWORDS] + [" ", "-", ".", "/", "x"]
+    for _ in range(1000):
+        text = "".join(rng.choice(pieces) for _ in range(rng.randint(0, 12)))
+        assert _keywords_present(text) == _keywords_by_substring(text), repr(text)
+
+
+_BASELINE_IMPACT_INDICATORS = [
+    r'\d+%\s*(?:increase|improvement|reduction|growth|faster|better)',
+    r'\$\d+[kmb]?\s*(?:saved|revenue|budget|cost)',
+    r'\d+\s*(?:users|customers|clients|projects|applications)',
+    r'(?:increased|improved|reduced|optimized|enhanced).*?\d+',
+    r'\d+x\s*(?:faster|improvement|increase)',
+    r'(?:led|managed)\s+(?:team of\s+)?\d+',
+]
+_BASELINE_PROJECT_INDICATORS = [
+    r'\b(?:project|projects|portfolio|github|personal\s+work)\b',
+    r'\b(?:built|created|developed).*?(?:application|app|website|system|tool)\b',
+    r'\b(?:side\s+project|open\s+source|hackathon|competition)\b',
+]
+
+
+def _baseline_component_scores(job_desc, resume_text, jd_skills, resume_skills, experience_data):
+    # The per-keyword implementation that precompute_jd_context / _keywords_present replaced
+    skill_analysis = find_skill_matches(jd_skills, resume_text, resume_skills)
+
+    confidence_weighted_score = 0
+    if skill_analysis['confidence_scores']:
+        total_weight = sum(skill_analysis['confidence_scores'].values())
+        confidence_weighted_score = total_weight / len(jd_skills) if total_weight > 0 else 0
+    skill_match_score = min(1.0, skill_analysis['match_rate'] * 0.7 + confidence_weighted_score * 0.3)
+
+    experience_keywords = ['experience', 'worked', 'developed', 'built', 'created', 'managed', 'led', 'implemented']
+    skills_with_context = 0
+    for skill in skill_analysis['matched_skills']:
+        if any(any(k in snippet.lower() for k in experience_keywords)
+               for snippet in skill_analysis['skill_evidence'].get(skill, [])):
+            skills_with_context += 1
+    total_matched_skills = len(skill_analysis['matched_skills'])
+    skill_context_score = skills_with_context / total_matched_skills if total_matched_skills > 0 else 0
+
+    technical_years = experience_data.get('technical_years_experience', 0)
+    if technical_years >= 5:
+        experience_duration_score = 1.0
+    elif technical_years >= 3:
+        experience_duration_score = 0.8 + (technical_years - 3) * 0.1
+    elif technical_years >= 1:
+        experience_duration_score = 0.4 + (technical_years - 1) * 0.2
+    elif technical_years >= 0.5:
+        experience_duration_score = 0.2 + (technical_years - 0.5) * 0.4
+    else:
+        experience_duration_score = technical_years * 0.4
+
+    impact_count = sum(len(re.findall(p, resume_text, re.IGNORECASE)) for p in _BASELINE_IMPACT_INDICATORS)
+    resume_lower = resume_text.lower()
+    if impact_count >= 5:
+        impact_score = 1.0
+    elif impact_count >= 3:
+        impact_score = 0.8
+    elif impact_count >= 1:
+        impact_score = 0.6
+    else:
+        action_verbs = ['developed', 'built', 'created', 'designed', 'implemented', 'optimized', 'improved', 'led',
+                        'managed']
+        impact_score = min(0.4, sum(1 for verb in action_verbs if verb in resume_lower) * 0.05)
+
+    project_score = min(1.0, 0.3 * sum(1 for p in _BASELINE_PROJECT_INDICATORS
+                                       if re.search(p, resume_text, re.IGNORECASE)))
+
+    education_score = 0.3
+    for term, score in _EDUCATION_INDICATORS.items():
+        if term in resume_lower:
+            education_score = max(education_score, score)
+            break
+
+    job_desc_lower = job_desc.lower()
+    job_type_matches = {}
+    for job_type, keywords in _JOB_TYPES.items():
+        job_match_count = sum(1 for keyword in keywords if keyword in job_desc_lower)
+        resume_match_count = sum(1 for keyword in keywords if keyword in resume_lower)
+        if job_match_count > 0:
+            job_type_matches[job_type] = (resume_match_count / len(keywords), job_match_count)
+    relevance_score = 0.5
+    if job_type_matches:
+        relevance_score = min(1.0, max(match[0] for match in job_type_matches.values()) + 0.3)
+
+    return {
+        "skill_match_score": skill_match_score,
+        "skill_context_score": skill_context_score,
+        "experience_duration_score": experience_duration_score,
+        "impact_score": impact_score,
+        "project_score": project_score,
+        "education_score": education_score,
+        "relevance_score": relevance_score,
+        "impact_indicators_found": impact_count,
+    }
+
+
+@pytest.mark.parametrize("index", range(len(RESUMES)))
+def test_scores_match_baseline(keyword_scan, index):
+    resume, resume_skills, experience = RESUMES[index], RESUME_SKILLS[index], EXPERIENCE[index]
+    scores = compute_enhanced_component_scores(JD, resume, JD_SKILLS, resume_skills, experience)
+    expected = _baseline_component_scores(JD, resume, JD_SKILLS, resume_skills, experience)
+
+    for key, value in expected.items():
+        actual = scores["match_statistics"][key] if key == "impact_indicators_found" else scores[key]
+        assert actual == pytest.approx(value), key
+    components = {k: v for k, v in scores.items() if k.endswith("_score")}
+    baseline_components = {k: v for k, v in expected.items() if k.endswith("_score")}
+    assert aggregate_enhanced_scores(components) == aggregate_enhanced_scores(baseline_components)
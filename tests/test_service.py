@@ -0,0 +1,19 @@
+from service import needs_feedback_report
+
+
+def _result(score, decision):
+    return {"final_score_0_10": score, "llm_justification": {"recommendation": {"decision": decision}}}
+
+
+def test_low_score_recommend_decision_still_gets_feedback():
+    # Below the recommendation bar the candidate is not listed, so the letter must still go out
+    assert needs_feedback_report(_result(3.0, "Recommend"))
+
+
+def test_recommended_candidates_skip_feedback():
+    assert not needs_feedback_report(_result(7.0, "Strong Recommend"))
+    assert not needs_feedback_report(_result(8.0, "Not Recommended"))
+
+
+def test_not_recommended_gets_feedback():
+    assert needs_feedback_report(_result(6.2, "Not Recommended"))
@@ -0,0 +1,138 @@
+import json
+import re
+from difflib import SequenceMatcher
+
+import pytest
+
+import skills
+from skills import build_jd_skill_index, create_skill_variants, find_skill_matches
+
+JD_SKILLS = ["Python", "React", "Node.js", "Kubernetes", "PostgreSQL", "Machine Learning", "Data Pipelines",
+             "CI/CD", "Terraform", "GraphQL", "Rust", "Event Driven"]
+RESUME = """Jane Doe - Senior Engineer
+Worked with Python and Django to build REST APIs and data pipelines.
+Built ReactJS dashboards and a React Native app. Deployed on K8s with Helm.
+Set up continuous integration in GitHub Actions. Wrote SQL against Postgres and MySQL.
+Data ingestion and streaming pipelines in Kafka. Some ML work with scikit-learn.
+Event based driven services.
+"""
+RESUME_SKILLS = ["Python", "Django", "ReactJS", "Kubernete", "Postgre", "Terraforms", "Graph-QL", "Kafka"]
+
+
+def _baseline_find_skill_matches(jd_skills, resume_text, resume_skills):
+    # The per-skill implementation find_skill_matches replaced
+    resume_text_lower = resume_text.lower()
+    matched_skills = []
+    skill_evidence = {}
+    confidence_scores = {}
+
+    for jd_skill in jd_skills:
+        jd_skill_variants = create_skill_variants(jd_skill)
+        best_match_score = 0.0
+        evidence_snippets = []
+
+        for variant in jd_skill_variants:
+            if variant in resume_text_lower:
+                best_match_score = max(best_match_score, 1.0)
+                for match in re.finditer(re.escape(variant), resume_text_lower):
+                    start = max(0, match.start() - 30)
+                    end = min(len(resume_text), match.end() + 30)
+                    evidence_snippets.append(resume_text[start:end].strip())
+
+        for resume_skill in resume_skills:
+            for jd_variant in jd_skill_variants:
+                for resume_variant in create_skill_variants(resume_skill):
+                    if jd_variant == resume_variant:
+                        best_match_score = max(best_match_score, 1.0)
+                    else:
+                        fuzzy_score = SequenceMatcher(None, jd_variant.lower(), resume_variant.lower()).ratio()
+                        if fuzzy_score >= 0.85:
+                            best_match_score = max(best_match_score, fuzzy_score)
+
+        if best_match_score < 0.5:
+            jd_words = set(jd_skill.lower().split())
+            resume_words = set(resume_text_lower.split())
+            if len(jd_words) > 1:
+                word_matches = jd_words.intersection(resume_words)
+                if len(word_matches) >= len(jd_words) * 0.6:
+                    best_match_score = max(best_match_score, len(word_matches) / len(jd_words) * 0.7)
+
+        if best_match_score >= 0.5:
+            matched_skills.append(jd_skill)
+            skill_evidence[jd_skill] = evidence_snippets[:3]
+            confidence_scores[jd_skill] = best_match_score
+
+    return {
+        'matched_skills': matched_skills,
+        'skill_evidence': skill_evidence,
+        'confidence_scores': confidence_scores,
+        'total_jd_skills': len(jd_skills),
+        'match_rate': len(matched_skills) / max(1, len(jd_skills))
+    }
+
+
+@pytest.fixture(params=["rapidfuzz", "difflib"])
+def fuzzy_backend(request, monkeypatch):
+    """Run the test with rapidfuzz when installed and with the SequenceMatcher fallback."""
+    if request.param == "rapidfuzz":
+        if skills.process is None:
+            pytest.skip("rapidfuzz is not installed")
+    else:
+        monkeypatch.setattr(skills, "process", None)
+        monkeypatch.setattr(skills, "Indel", None)
+    return request.param
+
+
+@pytest.fixture(params=["automaton", "regex"])
+def variant_scan(request, monkeypatch):
+    """Run the test with and without the pyahocorasick variant scan."""
+    if request.param == "automaton":
+        if skills.ahocorasick is None:
+            pytest.skip("pyahocorasick is not installed")
+    else:
+        monkeypatch.setattr(skills, "ahocorasick", None)
+    return request.param
+
+
+def _sorted_evidence(result):
+    # Snippet order follows set iteration over the variants
+    return {skill: sorted(snippets) for skill, snippets in result["skill_evidence"].items()}
+
+
+def test_matches_baseline(fuzzy_backend, variant_scan):
+    result = find_skill_matches(JD_SKILLS, RESUME, RESUME_SKILLS)
+    expected = _baseline_find_skill_matches(JD_SKILLS, RESUME, RESUME_SKILLS)
+
+    assert result["matched_skills"] == expected["matched_skills"]
+    assert result["match_rate"] == expected["match_rate"]
+    assert result["total_jd_skills"] == expected["total_jd_skills"]
+    assert _sorted_evidence(result) == _sorted_evidence(expected)
+    if fuzzy_backend == "difflib":
+        assert result["confidence_scores"] == expected["confidence_scores"]
+    else:
+        # Indel scores the longest common subsequence; SequenceMatcher can differ in the last bits
+        assert result["confidence_scores"] == pytest.approx(expected["confidence_scores"], rel=1e-12)
+
+
+def test_fixture_covers_every_match_kind():
+    expected = _baseline_find_skill_matches(JD_SKILLS, RESUME, RESUME_SKILLS)["confidence_scores"]
+    assert expected["Python"] == 1.0
+    assert 0.85 <= expected["Terraform"] < 1.0
+    assert expected["Data Pipelines"] == 1.0
+    assert expected["Event Driven"] == pytest.approx(0.7)
+    assert "Rust" not in expected
+
+
+def test_confidences_are_plain_floats(fuzzy_backend):
+    result = find_skill_matches(JD_SKILLS, RESUME, RESUME_SKILLS)
+    assert all(type(score) is float for score in result["confidence_scores"].values())
+    # No float32 noise once the scores go out as JSON
+    expected = _baseline_find_skill_matches(JD_SKILLS, RESUME, RESUME_SKILLS)["confidence_scores"]
+    encoded = json.loads(json.dumps(result["confidence_scores"]))
+    assert encoded == pytest.approx(expected, rel=1e-12)
+
+
+def test_shared_jd_index_matches_per_call_index():
+    index = build_jd_skill_index(JD_SKILLS)
+    assert (find_skill_matches(JD_SKILLS, RESUME, RESUME_SKILLS, jd_index=index)
+            == find_skill_matches(JD_SKILLS, RESUME, RESUME_SKILLS))
@@ -0,0 +1,66 @@
+import asyncio
+
+import pytest
+
+from utils import RecommendedWriter
+
+
+def _write_all(writer, names):
+    return asyncio.gather(*[writer.write(name, ["Call"], 8.0, {}) for name in names])
+
+
+def test_entries_are_written_in_order_and_flushed_on_close(tmp_path):
+    path = tmp_path / "nested" / "recommended.txt"
+
+    async def run():
+        async with RecommendedWriter(str(path)) as writer:
+            await _write_all(writer, [f"Candidate {i:02d}" for i in range(20)])
+            await writer.write("Candidate 20", ["Call"], 8.0, {})
+
+    asyncio.run(run())
+    text = path.read_text(encoding="utf-8")
+    positions = [text.index(f"Candidate {i:02d}") for i in range(21)]
+    assert positions == sorted(positions)
+
+
+def test_write_returns_once_the_entry_is_on_disk(tmp_path):
+    path = tmp_path / "recommended.txt"
+
+    async def run():
+        async with RecommendedWriter(str(path)) as writer:
+            await writer.write("Ada Lovelace", ["Call"], 9.0, {})
+            return path.read_text(encoding="utf-8")
+
+    assert "Ada Lovelace" in asyncio.run(run())
+
+
+def test_write_raises_when_the_consumer_fails(tmp_path, monkeypatch):
+    path = tmp_path / "recommended.txt"
+
+    def broken_write(self, text):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(RecommendedWriter, "_write_and_flush", broken_write)
+
+    async def run():
+        async with RecommendedWriter(str(path)) as writer:
+            results = await asyncio.gather(*[writer.write(n, [], 8.0, {}) for n in ("A", "B")],
+                                           return_exceptions=True)
+            assert all(isinstance(r, OSError) for r in results)
+            # The consumer keeps serving after a failed write
+            with pytest.raises(OSError):
+                await writer.write("C", [], 8.0, {})
+        # Leaving the block after the errors closes the file without raising
+        assert writer._fh.closed
+
+    asyncio.run(run())
+
+
+def test_write_raises_when_the_file_cannot_be_opened(tmp_path):
+    async def run():
+        # A directory cannot be opened for appending
+        async with RecommendedWriter(str(tmp_path)) as writer:
+            with pytest.raises(OSError):
+                await writer.write("A", [], 8.0, {})
+
+    asyncio.run(run())
@@ -1,55 +1,167 @@
+import asyncio
 import re
 from datetime import datetime
 from pathlib import Path
-from typing import List
+from typing import List, Optional
 
 from config import RECOMMENDED_FILE, logger
 
-EMAIL_RE = re.compile(r"[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+")
-URL_RE = re.compile(r"https?://[^\s]+")
+try:
+    import re2
+except ImportError:
+    re2 = None
+
+_RE2_INLINE_FLAGS = ((re.IGNORECASE, "i"), (re.MULTILINE, "m"), (re.DOTALL, "s"))
+
+
+def compile_untrusted(pattern: str, flags: int = 0):
+    """Compile a pattern that runs over uploaded (untrusted) text.
+
+    Uses RE2's linear-time engine when google-re2 is installed and accepts the
+    pattern; otherwise falls back to the standard ``re`` module.
+    """
+    if re2 is not None:
+        inline = "".join(letter for flag, letter in _RE2_INLINE_FLAGS if flags & flag)
+        try:
+            return re2.compile(f"(?{inline}){pattern}" if inline else pattern)
+        except Exception:
+            pass
+    return re.compile(pattern, flags)
+
+
+EMAIL_RE = compile_untrusted(r"[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+")
+URL_RE = compile_untrusted(r"https?://[^\s]+")
+# "Recommend" / "Strong Recommend" (or "...ed"), but not "Not Recommended"
+RECOMMEND_RE = re.compile(r"(?<!\bnot )\brecommend(?:ed)?\b", re.IGNORECASE)
+# Scores at or above this are recommended regardless of the LLM's decision wording
+RECOMMEND_SCORE_THRESHOLD = 7.5
+# A "Recommend" decision only counts from this score up
+RECOMMEND_DECISION_MIN_SCORE = 6.5
+
+
+def is_recommended(score: float, decision: str) -> bool:
+    """The batch recommendation rule, shared with the feedback-letter check."""
+    return score >= RECOMMEND_SCORE_THRESHOLD or (score >= RECOMMEND_DECISION_MIN_SCORE
+                                                  and bool(RECOMMEND_RE.search(decision)))
+
+_FILENAME_BAD_CHARS_RE = re.compile(r'[<>:"/\\|?*\x00-\x1f]+')
+_FILENAME_WHITESPACE_RE = re.compile(r"\s+")
 
 
 def sanitize_filename(name: str) -> str:
-    cleaned = re.sub(r'[<>:"/\\|?*\x00-\x1f]', "", name).strip()
-    cleaned = re.sub(r"\s+", "_", cleaned)
-    return cleaned[:100] if len(cleaned) > 100 else cleaned
-
-
-def append_to_recommended_file(candidate_name: str, suggested_steps: List[str],
-                               rating: float, justification: dict,
-                               recommended_file: str = RECOMMENDED_FILE):
-    try:
-        Path(recommended_file).parent.mkdir(parents=True, exist_ok=True)
-        with open(recommended_file, "a", encoding="utf-8") as fh:
-            fh.write(f"=" * 50 + "\n")
-            fh.write(f"CANDIDATE: {candidate_name}\n")
-            fh.write(f"OVERALL SCORE: {rating}/10\n")
-
-            rec_data = justification.get("recommendation", {})
-            fh.write(f"DECISION: {rec_data.get('decision', 'Unknown')}\n")
-            fh.write(f"CONFIDENCE: {rec_data.get('confidence', 'Unknown')}\n")
-
-            strengths = justification.get("overall_assessment", {}).get("key_strengths", [])
-            if strengths:
-                fh.write("KEY STRENGTHS:\n")
-                for strength in strengths[:3]:
-                    fh.write(f"  • {strength}\n")
-
-            fh.write("SUGGESTED NEXT STEPS:\n")
-            if isinstance(suggested_steps, list):
-                for step in suggested_steps:
-                    fh.write(f"  • {step}\n")
-            else:
-                fh.write(f"  • {suggested_steps}\n")
-
-            interview_focus = rec_data.get("interview_focus", [])
-            if interview_focus:
-                fh.write("INTERVIEW FOCUS AREAS:\n")
-                for area in interview_focus:
-                    fh.write(f"  • {area}\n")
-
-            fh.write(f"DATE: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-            fh.write("\n" + "=" * 50 + "\n\n")
-    except Exception as e:
-        logger.warning(f"Failed to append to recommended file {recommended_file}: {e}")
-        
\ No newline at end of file
+    # Two passes on purpose: removing bad characters (and stripping) can merge whitespace runs
+    cleaned = _FILENAME_BAD_CHARS_RE.sub("", name).strip()
+    return _FILENAME_WHITESPACE_RE.sub("_", cleaned)[:100]
+
+
+def _format_recommendation(candidate_name: str, suggested_steps: List[str],
+                           rating: float, justification: dict) -> str:
+    # Built as one string so each entry is a single write
+    parts = [
+        "=" * 50 + "\n",
+        f"CANDIDATE: {candidate_name}\n",
+        f"OVERALL SCORE: {rating}/10\n",
+    ]
+
+    rec_data = justification.get("recommendation", {})
+    parts.append(f"DECISION: {rec_data.get('decision', 'Unknown')}\n")
+    parts.append(f"CONFIDENCE: {rec_data.get('confidence', 'Unknown')}\n")
+
+    strengths = justification.get("overall_assessment", {}).get("key_strengths", [])
+    if strengths:
+        parts.append("KEY STRENGTHS:\n")
+        parts.extend(f"  • {strength}\n" for strength in strengths[:3])
+
+    parts.append("SUGGESTED NEXT STEPS:\n")
+    if isinstance(suggested_steps, list):
+        parts.extend(f"  • {step}\n" for step in suggested_steps)
+    else:
+        parts.append(f"  • {suggested_steps}\n")
+
+    interview_focus = rec_data.get("interview_focus", [])
+    if interview_focus:
+        parts.append("INTERVIEW FOCUS AREAS:\n")
+        parts.extend(f"  • {area}\n" for area in interview_focus)
+
+    parts.append(f"DATE: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+    parts.append("\n" + "=" * 50 + "\n\n")
+    return "".join(parts)
+
+
+class RecommendedWriter:
+    """Batch-scoped writer for the recommendations file.
+
+    The file is opened once with a 64 KB buffer. Concurrent tasks await
+    ``write()``, which enqueues the entry; a single consumer task writes
+    whatever has queued up in one worker-thread write and flush, so no lock is
+    needed and the event loop never blocks on the file. ``write()`` returns once
+    its entry is flushed and raises if it could not be written.
+    """
+
+    def __init__(self, recommended_file: str = RECOMMENDED_FILE, buffering: int = 1 << 16):
+        self.recommended_file = recommended_file
+        self.buffering = buffering
+        self._fh = None
+        self._open_error: Optional[BaseException] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._consumer: Optional[asyncio.Task] = None
+
+    def _open(self):
+        Path(self.recommended_file).parent.mkdir(parents=True, exist_ok=True)
+        return open(self.recommended_file, "a", buffering=self.buffering, encoding="utf-8")
+
+    async def __aenter__(self) -> "RecommendedWriter":
+        try:
+            self._fh = await asyncio.to_thread(self._open)
+        except Exception as e:
+            logger.warning(f"Failed to open recommended file {self.recommended_file}: {e}")
+            self._open_error = e
+        self._queue = asyncio.Queue()
+        self._consumer = asyncio.create_task(self._drain())
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self._queue.put_nowait(None)
+        await self._consumer
+        if self._fh is not None:
+            try:
+                await asyncio.to_thread(self._fh.close)
+            except Exception as e:
+                logger.warning(f"Failed to flush recommended file {self.recommended_file}: {e}")
+
+    async def write(self, candidate_name: str, suggested_steps: List[str], rating: float, justification: dict):
+        if self._fh is None:
+            raise OSError(f"Recommended file {self.recommended_file} could not be opened") from self._open_error
+        written = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((_format_recommendation(candidate_name, suggested_steps, rating, justification),
+                                written))
+        await written
+
+    def _write_and_flush(self, text: str):
+        self._fh.write(text)
+        self._fh.flush()
+
+    async def _drain(self):
+        while True:
+            batch = [await self._queue.get()]
+            while not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            entries = [entry for entry in batch if entry is not None]
+
+            if entries:
+                error = None
+                try:
+                    await asyncio.to_thread(self._write_and_flush, "".join(text for text, _ in entries))
+                except Exception as e:
+                    logger.warning(f"Failed to append to recommended file {self.recommended_file}: {e}")
+                    error = e
+                for _, written in entries:
+                    if written.done():
+                        continue
+                    if error is None:
+                        written.set_result(None)
+                    else:
+                        written.set_exception(error)
+
+            if len(entries) < len(batch):
+                return